@@ -0,0 +1,86 @@
+"""Alert de-duplication with an in-memory index and an append-only log.
+
+``should_send()`` is a dict lookup; nothing touches the disk until
+``flush()`` appends the alerts recorded since the last flush as JSON lines.
+Entries expire after the cooldown of their alert type (24 hours by default),
+and the log is rewritten without expired entries once they outnumber the
+live ones, so the history no longer grows forever.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+
+DEFAULT_WINDOW = 24 * 3600
+
+
+class AlertDedupStore:
+    def __init__(self, path, window_seconds=DEFAULT_WINDOW, cooldowns=None, legacy_file=None):
+        self.path = path
+        self.window_seconds = window_seconds
+        self.cooldowns = cooldowns or {}  # alert type -> seconds
+        self.index = {}                   # alert hash -> (sent_at epoch, alert type)
+        self.unflushed = []
+        self.log_lines = 0
+        self.lock = threading.Lock()
+        self._load(legacy_file)
+
+    def ttl(self, alert_type):
+        return self.cooldowns.get(alert_type, self.window_seconds)
+
+    def _load(self, legacy_file):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash mid-append
+                    self.index[entry['hash']] = (entry['sent_at'], entry.get('type', 'default'))
+                    self.log_lines += 1
+        elif legacy_file and os.path.exists(legacy_file):
+            # One-shot import of the old {hash: iso timestamp} alert_history.json
+            with open(legacy_file, 'r') as f:
+                for alert_hash, sent_at in json.load(f).items():
+                    sent_at = datetime.datetime.fromisoformat(sent_at).replace(tzinfo=datetime.timezone.utc)
+                    self.index[alert_hash] = (sent_at.timestamp(), 'default')
+        self._evict(time.time())
+        if self.log_lines > len(self.index) or not os.path.exists(self.path):
+            self._compact()
+
+    def should_send(self, alert_hash, alert_type='default', now=None):
+        """Return True and record the alert unless it was sent within its cooldown"""
+        now = now or time.time()
+        with self.lock:
+            entry = self.index.get(alert_hash)
+            if entry and now - entry[0] < self.ttl(entry[1]):
+                return False
+            self.index[alert_hash] = (now, alert_type)
+            self.unflushed.append({'hash': alert_hash, 'sent_at': now, 'type': alert_type})
+            return True
+
+    def flush(self):
+        """Append recorded alerts to the log and drop expired entries"""
+        with self.lock:
+            pending, self.unflushed = self.unflushed, []
+            if pending:
+                with open(self.path, 'a') as f:
+                    f.write("".join(json.dumps(entry) + "\n" for entry in pending))
+                self.log_lines += len(pending)
+            self._evict(time.time())
+            if self.log_lines > 2 * max(len(self.index), 1):
+                self._compact()
+
+    def _evict(self, now):
+        expired = [h for h, (sent_at, kind) in self.index.items() if now - sent_at >= self.ttl(kind)]
+        for alert_hash in expired:
+            del self.index[alert_hash]
+
+    def _compact(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for alert_hash, (sent_at, kind) in self.index.items():
+                f.write(json.dumps({'hash': alert_hash, 'sent_at': sent_at, 'type': kind}) + "\n")
+        os.replace(tmp_path, self.path)
+        self.log_lines = len(self.index)
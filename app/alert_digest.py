@@ -0,0 +1,126 @@
+"""Coalesces the alerts raised during a scan cycle into one digest per receiver.
+
+Checks call ``add()`` instead of emailing directly. ``end_cycle()`` (or the
+configured window timer) groups everything collected by severity and sends
+one full digest to each email receiver and a short plain-text form to SMS
+gateway addresses, so a market-wide move costs one message per receiver.
+"""
+import datetime
+import threading
+
+SEVERITIES = ('critical', 'warning', 'info')
+SEVERITY_ICONS = {'critical': '🚨', 'warning': '⚠️', 'info': '📈'}
+
+DEFAULT_SMS_GATEWAYS = (
+    'txt.att.net', 'mms.att.net', 'vtext.com', 'vzwpix.com', 'tmomail.net',
+    'messaging.sprintpcs.com', 'msg.fi.google.com', 'email.uscc.net',
+    'sms.myboostmobile.com', 'mymetropcs.com', 'sms.cricketwireless.net',
+)
+DEFAULT_SMS_MAX_CHARS = 160
+
+
+def is_sms_gateway(address, gateways=DEFAULT_SMS_GATEWAYS):
+    return address.rsplit('@', 1)[-1].lower() in gateways
+
+
+class AlertDigest:
+    def __init__(self, receivers, send, window_seconds=0,
+                 sms_gateways=DEFAULT_SMS_GATEWAYS, sms_max_chars=DEFAULT_SMS_MAX_CHARS):
+        self.receivers = receivers
+        self.send = send  # send(subject, body, receivers=[...])
+        self.window_seconds = window_seconds
+        self.sms_gateways = tuple(g.lower() for g in sms_gateways)
+        self.sms_max_chars = sms_max_chars
+        self.pending = []
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, ticker, severity, subject, body, summary=None):
+        """Collect one alert; `summary` is the one-liner used in digests and SMS"""
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown alert severity: {severity}")
+        with self.lock:
+            self.pending.append({
+                'ticker': ticker,
+                'severity': severity,
+                'subject': subject,
+                'body': body,
+                'summary': summary or subject,
+            })
+            if self.window_seconds > 0 and self.timer is None:
+                self.timer = threading.Timer(self.window_seconds, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def end_cycle(self):
+        """Called at the end of a scan; flushes unless a time window is configured"""
+        if self.window_seconds <= 0:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            alerts, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not alerts:
+            return 0
+
+        alerts.sort(key=lambda a: SEVERITIES.index(a['severity']))
+        email_receivers = [r for r in self.receivers if not is_sms_gateway(r, self.sms_gateways)]
+        sms_receivers = [r for r in self.receivers if is_sms_gateway(r, self.sms_gateways)]
+
+        subject, body = self.render_email(alerts)
+        for receiver in email_receivers:
+            self.send(subject=subject, body=body, receivers=[receiver])
+        if sms_receivers:
+            sms_subject, sms_body = self.render_sms(alerts)
+            for receiver in sms_receivers:
+                self.send(subject=sms_subject, body=sms_body, receivers=[receiver])
+        return len(alerts)
+
+    # --- Rendering ---
+
+    def render_email(self, alerts):
+        if len(alerts) == 1:
+            return alerts[0]['subject'], alerts[0]['body']
+
+        counts = _severity_counts(alerts)
+        tickers = sorted({a['ticker'] for a in alerts})
+        subject = (f"[ETF Monitor] {len(alerts)} alerts ({_count_text(counts)}) — "
+                   f"{', '.join(tickers[:6])}{' …' if len(tickers) > 6 else ''}")
+
+        now = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')
+        lines = [f"📬 ETF Monitor Digest — {now}",
+                 f"{len(alerts)} alerts across {len(tickers)} tickers", ""]
+        for severity in SEVERITIES:
+            group = [a for a in alerts if a['severity'] == severity]
+            if not group:
+                continue
+            lines.append(f"━━━━ {SEVERITY_ICONS[severity]} {severity.upper()} ({len(group)}) ━━━━")
+            lines.extend(f"• {a['summary']}" for a in group)
+            lines.append("")
+
+        lines.append("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        lines.append("Details")
+        for alert in alerts:
+            lines += ["", f"=== {alert['subject']} ===", alert['body'].strip()]
+        return subject, "\n".join(lines)
+
+    def render_sms(self, alerts):
+        counts = _severity_counts(alerts)
+        text = f"ETF: {_count_text(counts)} | " + " | ".join(a['summary'] for a in alerts)
+        if len(text) > self.sms_max_chars:
+            text = text[:self.sms_max_chars - 1] + "…"
+        return "ETF Alert", text
+
+
+def _severity_counts(alerts):
+    counts = {}
+    for alert in alerts:
+        counts[alert['severity']] = counts.get(alert['severity'], 0) + 1
+    return counts
+
+
+def _count_text(counts):
+    return ", ".join(f"{counts[s]} {s}" for s in SEVERITIES if s in counts)
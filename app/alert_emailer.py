@@ -1,29 +1,243 @@
+import json
+import os
+import queue
 import smtplib
+import threading
+import time
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import yaml
 
-# Load config
-with open('config.yaml', 'r') as file:
-    config = yaml.safe_load(file)
+from config import get_config
 
-EMAIL_SETTINGS = config['email_settings']
+# Outbound queue settings
+SPOOL_DIR = 'alert_spool'
+BATCH_SIZE = 20            # messages sent per connection check
+SMTP_TIMEOUT = 30
+IDLE_DISCONNECT = 300      # close the SMTP session after 5 idle minutes
+MAX_RETRY_DELAY = 3600
+SESSION_SETTINGS = ('smtp_server', 'smtp_port', 'sender_email', 'sender_password')
 
-def send_email_alert(subject, body):
+
+def build_message(subject, body, sender, receivers):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ", ".join(receivers)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def is_permanent_failure(error):
+    """True for errors that retrying the same message cannot fix"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, (smtplib.SMTPDataError, smtplib.SMTPSenderRefused)):
+        return error.smtp_code >= 500
+    return isinstance(error, (ValueError, KeyError))  # corrupt spool file
+
+
+def _claim_owner_alive(name):
+    """True if the process named in a `<alert>.json.<pid>.sending` claim is still running"""
     try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_SETTINGS['sender_email']
-        msg['To'] = ", ".join(EMAIL_SETTINGS['receivers'])
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+        pid = int(name.rsplit('.', 2)[1])
+        os.kill(pid, 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class AlertOutbox:
+    """Background sender that spools alerts to disk and reuses one SMTP session
+
+    Every alert is written to the spool directory before it is queued, so a
+    crash or SMTP outage never loses it; spooled files are re-queued on
+    startup and deleted only once the server has accepted them. Several
+    processes may share the spool (the monitor and test_monitor.py), so a
+    sender claims a file by renaming it before sending; a file that is gone
+    or already claimed belongs to another sender and is skipped.
+
+    Without explicit settings the live ``email_settings`` are read for every
+    message, and the session is reopened when the server or credentials change.
+    """
+
+    def __init__(self, settings=None, spool_dir=SPOOL_DIR):
+        self.fixed_settings = settings
+        self.spool_dir = spool_dir
+        self.failed_dir = os.path.join(spool_dir, 'failed')
+        os.makedirs(self.failed_dir, exist_ok=True)
+        self.queue = queue.Queue()
+        self.server = None
+        self.session_key = None  # SESSION_SETTINGS the open session was made with
+        self.retry_delay = 1
+        for name in os.listdir(spool_dir):
+            # Release claims left behind by a sender that died mid-send
+            if name.endswith('.sending') and not _claim_owner_alive(name):
+                try:
+                    os.replace(os.path.join(spool_dir, name), os.path.join(spool_dir, name.rsplit('.', 2)[0]))
+                except FileNotFoundError:
+                    pass
+        for name in sorted(os.listdir(spool_dir)):
+            if name.endswith('.json'):
+                self.queue.put(os.path.join(spool_dir, name))
+        self.thread = threading.Thread(target=self._run, name="alert-outbox", daemon=True)
+        self.thread.start()
+
+    # --- Producer side ---
+
+    def enqueue(self, subject, body, receivers=None):
+        """Spool an alert and return immediately; delivery happens in the background"""
+        message = {'subject': subject, 'body': body, 'receivers': receivers}
+        name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json"
+        path = os.path.join(self.spool_dir, name)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(message, f)
+        os.replace(path + '.tmp', path)
+        self.queue.put(path)
+        return path
+
+    def flush(self, timeout=None):
+        """Block until every queued alert has been sent or dead-lettered"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    # --- SMTP session ---
+
+    @property
+    def settings(self):
+        return self.fixed_settings or get_config()['email_settings']
 
-        server = smtplib.SMTP(EMAIL_SETTINGS['smtp_server'], EMAIL_SETTINGS['smtp_port'])
+    def _connect(self, settings):
+        server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'], timeout=SMTP_TIMEOUT)
         server.starttls()
-        server.login(EMAIL_SETTINGS['sender_email'], EMAIL_SETTINGS['sender_password'])
-        server.sendmail(EMAIL_SETTINGS['sender_email'], EMAIL_SETTINGS['receivers'], msg.as_string())
-        server.quit()
+        server.login(settings['sender_email'], settings['sender_password'])
+        return server
 
-        print(f"✅ Alert email sent: {subject}")
+    def _ensure_connection(self):
+        settings = self.settings
+        key = tuple(settings[name] for name in SESSION_SETTINGS)
+        if self.server is not None and key != self.session_key:
+            print("🔁 Email settings changed, reconnecting to the SMTP server")
+            self._disconnect()
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return self.server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+        self.server = self._connect(settings)
+        self.session_key = key
+        return self.server
+
+    def _disconnect(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    # --- Consumer side ---
+
+    def _next_batch(self):
+        try:
+            first = self.queue.get(timeout=IDLE_DISCONNECT)
+        except queue.Empty:
+            self._disconnect()
+            return []
+        batch = [first]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _claim(self, path):
+        """Rename a spooled alert to this sender's claim; None if another sender has it"""
+        claimed = f"{path}.{os.getpid()}.sending"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _send(self, claimed):
+        with open(claimed, 'r') as f:
+            message = json.load(f)
+        settings = self.settings
+        receivers = message.get('receivers') or settings['receivers']
+        msg = build_message(message['subject'], message['body'], settings['sender_email'], receivers)
+        self.server.sendmail(settings['sender_email'], receivers, msg.as_string())
+        os.remove(claimed)
+        print(f"✅ Alert email sent: {message['subject']}")
+
+    def _deliver(self, path):
+        """Send one spooled alert; a connection-level failure is re-raised with the file back in the spool"""
+        claimed = self._claim(path)
+        if claimed is None:
+            return  # sent (or being sent) by another sender sharing the spool
+        try:
+            self._send(claimed)
+        except Exception as e:
+            if not is_permanent_failure(e):
+                os.replace(claimed, path)
+                raise
+            # Permanent failure for this message only; keep it for inspection.
+            print(f"❌ Alert email rejected, moved to {self.failed_dir}: {e}")
+            os.replace(claimed, os.path.join(self.failed_dir, os.path.basename(path)))
+
+    def _run(self):
+        while True:
+            pending = self._next_batch()
+            if not pending:
+                continue
+            try:
+                self._ensure_connection()
+                while pending:
+                    self._deliver(pending[0])
+                    pending.pop(0)
+                    self.queue.task_done()
+                self.retry_delay = 1
+            except Exception as e:
+                # Connection-level failure: drop the session and retry the
+                # unsent part of the batch from the spool after a backoff.
+                print(f"❌ Error sending alert email (retrying in {self.retry_delay}s): {e}")
+                self._disconnect()
+                time.sleep(self.retry_delay)
+                self.retry_delay = min(MAX_RETRY_DELAY, self.retry_delay * 2)
+                for path in pending:
+                    self.queue.put(path)
+                    self.queue.task_done()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = AlertOutbox()
+        return _outbox
+
+
+def send_email_alert(subject, body, receivers=None):
+    try:
+        get_outbox().enqueue(subject, body, receivers)
+        print(f"📤 Alert queued: {subject}")
     except Exception as e:
-        print(f"❌ Error sending alert email: {e}")
+        print(f"❌ Error queueing alert email: {e}")
+
 
+def flush_alerts(timeout=None):
+    """Wait for the outbound queue to drain (used by one-shot scripts)"""
+    return get_outbox().flush(timeout)
@@ -1,43 +1,106 @@
-import requests
-import yfinance as yf
-import schedule
-import time
-import yaml
 import hashlib
 import json
 import os
 import sys
 import datetime
+import itertools
+import threading
+import numpy as np
+from config import get_config, get_config_service, get_portfolio, get_rules
 from alert_emailer import send_email_alert
+from alert_digest import AlertDigest, DEFAULT_SMS_GATEWAYS
+from alert_dedup import AlertDedupStore
+from tracker_store import open_tracker
+from tracker_retention import compact_store, DEFAULT_RAW_DAYS, DEFAULT_DAILY_DAYS
+
+# Importing this module only reads the shared config. yfinance/pandas
+# (market_snapshot, dividend_history), requests and the scheduler load on
+# first use, and the alert history is opened by the first alert check.
 
 # --- CONFIGURATIONS ---
 
 FAST_DEBUG = True  # <<<< Set this False for production (hourly scans)
 
-# Load configuration
-with open('config.yaml', 'r') as file:
-    config = yaml.safe_load(file)
-
-TICKERS = config['tickers']
-POLYGON_API_KEY = config['polygon_api_key']
-EMAIL_SETTINGS = config['email_settings']
-RISK_THRESHOLDS = config['risk_thresholds']
-PRINCIPAL_THRESHOLDS = config['principal_loss_thresholds']
-AUM_THRESHOLDS = config['aum_thresholds']
-HEARTBEAT_URL = config.get('heartbeat_url', None)
-WEEKLY_REPORT_DAY = config.get('weekly_report_day', "Monday")
-CAPITAL_GAINS_TAX = config.get('capital_gains_tax_rate', 0.50)
-TRIM_COOLDOWN_DAYS = config.get('trim_cooldown_days', 30)
+# Module-level settings are rebound from each validated config snapshot, so
+# functions always read the live values (see apply_config).
+TICKERS = []
+POLYGON_API_KEY = None
+EMAIL_SETTINGS = {}
+AUM_THRESHOLDS = {}
+HEARTBEAT_URL = None
+WEEKLY_REPORT_DAY = "Monday"
+CAPITAL_GAINS_TAX = 0.50
+TRIM_COOLDOWN_DAYS = 30
+SCHEDULER_SETTINGS = {}
+RETENTION_SETTINGS = {}
+DIGEST_SETTINGS = {}
+
+# Alerts raised during a cycle are coalesced into one digest per receiver.
+# The scan (risk rules and smart trims) and the AUM check run on separate
+# scheduler threads, so each has its own digest; a shared one would let one
+# job's end_cycle() flush the other's half-collected alerts.
+_alert_digests = {}  # job name -> AlertDigest
+_alert_digests_lock = threading.Lock()
+
+def _configure_digest(digest):
+    digest.receivers = EMAIL_SETTINGS['receivers']
+    digest.window_seconds = DIGEST_SETTINGS.get('window_seconds', 0)
+    digest.sms_gateways = tuple(g.lower() for g in DIGEST_SETTINGS.get('sms_gateways', DEFAULT_SMS_GATEWAYS))
+
+def get_alert_digest(job):
+    """The digest collecting one job's alerts, created on first use"""
+    with _alert_digests_lock:
+        if job not in _alert_digests:
+            _alert_digests[job] = AlertDigest([], send_email_alert)
+            _configure_digest(_alert_digests[job])
+        return _alert_digests[job]
+
+def apply_config(config):
+    """Bind the module settings (and the digest/dedup they feed) to a config dict"""
+    global TICKERS, POLYGON_API_KEY, EMAIL_SETTINGS, AUM_THRESHOLDS
+    global HEARTBEAT_URL, WEEKLY_REPORT_DAY, CAPITAL_GAINS_TAX, TRIM_COOLDOWN_DAYS
+    global SCHEDULER_SETTINGS, RETENTION_SETTINGS, DIGEST_SETTINGS
+    TICKERS = config['tickers']
+    POLYGON_API_KEY = config['polygon_api_key']
+    EMAIL_SETTINGS = config['email_settings']
+    AUM_THRESHOLDS = config['aum_thresholds']
+    HEARTBEAT_URL = config.get('heartbeat_url', None)
+    WEEKLY_REPORT_DAY = config.get('weekly_report_day', "Monday")
+    CAPITAL_GAINS_TAX = config.get('capital_gains_tax_rate', 0.50)
+    TRIM_COOLDOWN_DAYS = config.get('trim_cooldown_days', 30)
+    SCHEDULER_SETTINGS = config.get('scheduler', {})
+    RETENTION_SETTINGS = config.get('tracker_retention', {})
+    DIGEST_SETTINGS = config.get('alert_digest', {})
+
+    with _alert_digests_lock:
+        for digest in _alert_digests.values():
+            _configure_digest(digest)
+    with _alert_dedup_lock:
+        if _alert_dedup is not None:
+            _alert_dedup.cooldowns['trim'] = TRIM_COOLDOWN_DAYS * 86400
 
 # Tracker files
-ALERT_HISTORY_FILE = 'alert_history.json'
+ALERT_HISTORY_FILE = 'alert_history.log'
+LEGACY_ALERT_HISTORY_FILE = 'alert_history.json'
 NAV_TRACKER_FILE = 'nav_tracker.json'
-PORTFOLIO_FILE = 'portfolio.json'
 AUM_TRACKER_FILE = 'aum_tracker.json'
 MARKET_TRACKER_FILE = 'market_price_tracker.json'
 TRIM_TRACKER_FILE = 'trim_tracker.json'
 
+_alert_dedup = None
+_alert_dedup_lock = threading.Lock()  # the scan and AUM threads may both create it
+apply_config(get_config())
+
+# Job cadence/timeouts, overridable per job under `scheduler:` in config.yaml
+DEFAULT_JOB_SETTINGS = {
+    'scan': {'interval_minutes': 60, 'timeout_seconds': 900, 'market_hours_only': True},
+    'aum': {'interval_minutes': 24 * 60, 'timeout_seconds': 1800, 'market_hours_only': False},
+    'compact': {'interval_minutes': 24 * 60, 'timeout_seconds': 1800, 'market_hours_only': False},
+    'dividends': {'interval_minutes': 24 * 60, 'timeout_seconds': 600, 'market_hours_only': False},
+}
+
 # Constants
+CONFIG_POLL_SECONDS = 30
 TIMEOUT = 5
 LOG_FILE = "output.log"
 
@@ -67,25 +130,32 @@ def save_json(filename, data):
 def hash_alert(text):
     return hashlib.sha256(text.encode()).hexdigest()
 
-def should_send_alert(alert_hash):
+def get_alert_dedup():
+    """Sent-alert index; trim alerts share the trim cooldown, everything else 24h"""
+    global _alert_dedup
+    with _alert_dedup_lock:
+        if _alert_dedup is None:
+            _alert_dedup = AlertDedupStore(
+                ALERT_HISTORY_FILE,
+                cooldowns={'trim': TRIM_COOLDOWN_DAYS * 86400},
+                legacy_file=LEGACY_ALERT_HISTORY_FILE)
+        return _alert_dedup
+
+def should_send_alert(alert_hash, alert_type='default'):
     if FAST_DEBUG:
         return True  # In debug mode, always send alerts immediately
+    return get_alert_dedup().should_send(alert_hash, alert_type)
 
-    history = load_json(ALERT_HISTORY_FILE)
-    now = datetime.datetime.utcnow()
-    if alert_hash not in history:
-        history[alert_hash] = now.isoformat()
-        save_json(ALERT_HISTORY_FILE, history)
-        return True
-    last_sent = datetime.datetime.fromisoformat(history[alert_hash])
-    if (now - last_sent).total_seconds() > 86400:
-        history[alert_hash] = now.isoformat()
-        save_json(ALERT_HISTORY_FILE, history)
-        return True
-    return False
+def take_snapshot(tickers=None):
+    """Fetch one market snapshot covering the watchlist and every held position"""
+    tickers = tickers or get_config_service().current().watchlist
+    log(f"📡 Fetching market snapshot for {len(tickers)} tickers...")
+    from market_snapshot import MarketSnapshot
+    return MarketSnapshot.fetch(tickers, log=log)
 
 def send_heartbeat():
     if HEARTBEAT_URL:
+        import requests
         try:
             requests.get(HEARTBEAT_URL, timeout=5)
             log("💓 Heartbeat sent successfully")
@@ -94,17 +164,16 @@ def send_heartbeat():
 
 # --- Smart Trim Logic ---
 
-def find_discounted_etfs(exclude_ticker=None):
+def find_discounted_etfs(exclude_ticker=None, snapshot=None):
+    snapshot = snapshot or take_snapshot()
     discounts = []
     for ticker in TICKERS:
         if ticker == exclude_ticker:
             continue
         try:
-            etf = yf.Ticker(ticker)
-            nav = etf.info.get('navPrice', None)
-            hist = etf.history(period="1d")
-            if nav and not hist.empty:
-                current_price = hist['Close'].iloc[-1]
+            nav = snapshot.nav(ticker)
+            current_price = snapshot.price(ticker)
+            if nav and current_price is not None:
                 discount_pct = (nav - current_price) / nav * 100
                 if discount_pct > 0:
                     discounts.append((ticker, discount_pct))
@@ -164,48 +233,54 @@ Sell {shares_to_trim} shares (~{shares_to_trim/shares*100:.1f}% of position)
 ✅ Strategy: Harvest gains, rotate into discounted, high-yield, stable funds.
 """
 
-def monitor_smart_trims():
+def trim_table(snapshot, portfolio):
+    """Metrics table for the trim rules: one row per held position with a price"""
+    tickers = [t for t in portfolio if snapshot.price(t) is not None]
+    price = np.array([snapshot.price(t) for t in tickers], dtype=float)
+    buy_nav = np.array([portfolio[t]['buy_nav'] for t in tickers], dtype=float)
+    return {
+        'ticker': tickers,
+        'price': price,
+        'buy_nav': buy_nav,
+        'gain_pct': (price - buy_nav) / buy_nav * 100,
+        'shares': np.array([portfolio[t]['shares'] for t in tickers], dtype=float),
+    }
+
+def monitor_smart_trims(snapshot, digest):
+    """Queue trim alerts for held positions into the caller's digest, which the caller flushes"""
     log("\n✂️ Checking Smart Trim Conditions...")
-    portfolio = load_json(PORTFOLIO_FILE)
+    portfolio = get_portfolio()
     trim_tracker = load_json(TRIM_TRACKER_FILE)
     now = datetime.datetime.utcnow()
-
-    for ticker, data in portfolio.items():
-        shares = data['shares']
-        buy_nav = data['buy_nav']
-
-        hist = yf.Ticker(ticker).history(period="1d")
-        if hist.empty:
-            continue
-
-        current_price = hist['Close'].iloc[-1]
-        gain_pct = (current_price - buy_nav) / buy_nav
-
-        last_trim = trim_tracker.get(ticker)
-        allow_trim = True
-
-        if last_trim:
-            last_trim_dt = datetime.datetime.fromisoformat(last_trim)
-            if (now - last_trim_dt).days < TRIM_COOLDOWN_DAYS:
-                if not FAST_DEBUG:
-                    next_ok = last_trim_dt + datetime.timedelta(days=TRIM_COOLDOWN_DAYS)
-                    log(f"🔕 Trim alert skipped for {ticker} — in cooldown until {next_ok.strftime('%Y-%m-%d')}")
-                    allow_trim = False
-                else:
+    ranking = None  # scored lazily, once per cycle, when the first trim fires
+
+    table = trim_table(snapshot, portfolio)
+    rules = get_rules('trim')
+    for rule, rows in rules.evaluate(table):
+        for i in rows:
+            ticker = table['ticker'][i]
+            shares = portfolio[ticker]['shares']
+            buy_nav = portfolio[ticker]['buy_nav']
+            current_price = table['price'][i]
+            gain_pct = table['gain_pct'][i] / 100
+
+            last_trim = trim_tracker.get(ticker)
+            if last_trim:
+                last_trim_dt = datetime.datetime.fromisoformat(last_trim)
+                if (now - last_trim_dt).days < TRIM_COOLDOWN_DAYS:
+                    if not FAST_DEBUG:
+                        next_ok = last_trim_dt + datetime.timedelta(days=TRIM_COOLDOWN_DAYS)
+                        log(f"🔕 Trim alert skipped for {ticker} — in cooldown until {next_ok.strftime('%Y-%m-%d')}")
+                        continue
                     log(f"⚠️ Trim alert cooldown bypassed for {ticker} due to FAST_DEBUG=True")
 
-        if gain_pct >= 0.15 and allow_trim:
-            trim_pct = 0.10
-            if gain_pct >= 0.18:
-                trim_pct = 0.15
-            if gain_pct >= 0.25:
-                trim_pct = 0.20
-
-            shares_to_trim = int(shares * trim_pct)
+            shares_to_trim = int(shares * rule.params.get('trim_pct', 0.10))
             trim_value = shares_to_trim * current_price
             gain_dollars = (current_price - buy_nav) * shares_to_trim
             after_tax_gain = gain_dollars * (1 - CAPITAL_GAINS_TAX)
-            suggestions = find_best_rotation_targets(exclude_ticker=ticker)
+            if ranking is None:
+                ranking = rank_rotation_targets(snapshot)
+            suggestions = find_best_rotation_targets(exclude_ticker=ticker, ranking=ranking)
             next_alert_dt = now + datetime.timedelta(days=TRIM_COOLDOWN_DAYS)
 
             # --- Build email body ---
@@ -219,88 +294,162 @@ def monitor_smart_trims():
 
             alert_body_hash = hash_alert(email_body)
 
-            if FAST_DEBUG or should_send_alert(alert_body_hash):
-                send_email_alert(
-                    subject=subject_line,
-                    body=email_body
-                )
+            if FAST_DEBUG or should_send_alert(alert_body_hash, 'trim'):
+                digest.add(
+                    ticker, rule.severity, subject_line, email_body,
+                    summary=f"{ticker} +{gain_pct*100:.1f}%: trim {shares_to_trim} sh (${trim_value:,.0f})")
                 if not FAST_DEBUG:
                     trim_tracker[ticker] = now.isoformat()
             else:
                 log(f"🔕 Trim email suppressed for {ticker} (duplicate)")
-    
-    save_json(TRIM_TRACKER_FILE, trim_tracker)
 
-def find_best_rotation_targets(exclude_ticker=None):
-    candidates = []
-    now = datetime.datetime.utcnow()
+    log(f"📏 Trim rules: {rules.summary()}")
+    save_json(TRIM_TRACKER_FILE, trim_tracker)
+    get_alert_dedup().flush()
 
+def rotation_table(snapshot):
+    """Metrics table for the rotation rules: every watchlist ticker with a NAV, yield and history"""
+    rows = []
     for ticker in TICKERS:
-        if ticker == exclude_ticker:
-            continue
-
-        try:
-            etf = yf.Ticker(ticker)
-            info = etf.info
-            nav = info.get('navPrice')
-            div_yield = info.get('yield') or info.get('dividendYield') or 0
-
-            if not nav or div_yield is None or div_yield <= 0:
-                continue
-
-            hist = etf.history(period="60d")
-            if hist.empty or 'Close' not in hist:
-                continue
-
-            current_price = hist['Close'].iloc[-1]
-            discount_pct = (nav - current_price) / nav * 100
-
-            nav_60d_start = hist['Close'].iloc[0]
-            nav_change_pct = ((current_price - nav_60d_start) / nav_60d_start) * 100
-
-            # Filters:
-            if nav < 50000000:  # Filter out very small funds
-                continue
-            if nav_change_pct < -10:  # Avoid decaying NAVs
-                continue
-            if div_yield < 0.05:  # Filter out weak payers
-                continue
-
-            # Simple reinvestment score (balance yield and discount)
-            reinvest_score = (div_yield * 100) + discount_pct - abs(nav_change_pct / 2)
-
-            candidates.append({
-                "ticker": ticker,
-                "discount_pct": discount_pct,
-                "yield_pct": div_yield * 100,
-                "nav_stability": nav_change_pct,
-                "score": reinvest_score,
-                "price": current_price
-            })
-
-        except Exception as e:
-            log(f"⚠️ Skipping {ticker} for reinvestment scan: {e}")
+        nav = snapshot.nav(ticker)
+        div_yield = snapshot.dividend_yield(ticker)
+        hist = snapshot.history(ticker)
+        if not nav or div_yield is None or div_yield <= 0 or hist.empty or 'Close' not in hist:
             continue
-
+        total_assets = snapshot.total_assets(ticker)
+        rows.append((ticker, nav, hist['Close'].iloc[-1], hist['Close'].iloc[0], div_yield,
+                     np.nan if total_assets is None else total_assets))
+    columns = list(zip(*rows)) if rows else [()] * 6
+    tickers = list(columns[0])
+    nav, price, start, div_yield, total_assets = (np.array(column, dtype=float) for column in columns[1:])
+    return {
+        'ticker': tickers,
+        'nav': nav,
+        'price': price,
+        'discount_pct': (nav - price) / nav * 100,
+        'nav_change_pct': (price - start) / start * 100,
+        'yield_pct': div_yield * 100,
+        'total_assets': total_assets,
+    }
+
+def rank_rotation_targets(snapshot=None):
+    """Score every rotation candidate that no rotation rule excludes, best reinvest_score first"""
+    snapshot = snapshot or take_snapshot()
+    table = rotation_table(snapshot)
+    excluded = np.zeros(len(table['ticker']), dtype=bool)
+    for rule, rows in get_rules('rotation').evaluate(table):
+        excluded[rows] = True
+
+    # Simple reinvestment score (balance yield and discount)
+    score = table['yield_pct'] + table['discount_pct'] - np.abs(table['nav_change_pct'] / 2)
+    candidates = [
+        {
+            "ticker": table['ticker'][i],
+            "discount_pct": table['discount_pct'][i],
+            "yield_pct": table['yield_pct'][i],
+            "nav_stability": table['nav_change_pct'][i],
+            "score": score[i],
+            "price": table['price'][i]
+        }
+        for i in np.flatnonzero(~excluded)
+    ]
     candidates.sort(key=lambda x: x['score'], reverse=True)
-    return candidates[:3]
-
+    return candidates
+
+def find_best_rotation_targets(exclude_ticker=None, snapshot=None, ranking=None):
+    if ranking is None:
+        ranking = rank_rotation_targets(snapshot)
+    return list(itertools.islice((c for c in ranking if c['ticker'] != exclude_ticker), 3))
+
+
+def compact_trackers():
+    """Roll old NAV/price history into daily/weekly bars"""
+    for json_file, value_key in ((NAV_TRACKER_FILE, 'nav'), (MARKET_TRACKER_FILE, 'price')):
+        before, after = compact_store(
+            open_tracker(json_file, value_key),
+            raw_days=RETENTION_SETTINGS.get('raw_days', DEFAULT_RAW_DAYS),
+            daily_days=RETENTION_SETTINGS.get('daily_days', DEFAULT_DAILY_DAYS))
+        log(f"🗜️ Compacted {json_file}: {before:,} -> {after:,} raw points")
+
+def sync_dividend_history():
+    """Bring the dashboard's dividend store up to date for every portfolio ticker in one request"""
+    from dividend_history import sync_dividends
+    sync_dividends(get_portfolio().keys(), log=log)
+
+def record_snapshot(snapshot, tickers=None):
+    """Append the snapshot's NAV and price for each ticker to the trackers"""
+    nav_tracker = open_tracker(NAV_TRACKER_FILE, 'nav')
+    market_tracker = open_tracker(MARKET_TRACKER_FILE, 'price')
+    for ticker in tickers or snapshot.tickers:
+        nav, price = snapshot.nav(ticker), snapshot.price(ticker)
+        if nav is not None:
+            nav_tracker.append(ticker, nav, snapshot.taken_at)
+        if price is not None:
+            market_tracker.append(ticker, price, snapshot.taken_at)
+
+def warm_tickers(tickers):
+    """Fetch and record only newly added tickers, instead of waiting for the next full scan"""
+    tickers = sorted(tickers)
+    log(f"🔥 Warming {len(tickers)} new tickers: {', '.join(tickers)}")
+    record_snapshot(take_snapshot(tickers), tickers)
+    held = [t for t in tickers if t in get_portfolio()]
+    if held:
+        from dividend_history import sync_dividends
+        sync_dividends(held, log=log)
+
+def warm_response_cache():
+    """Prefetch stale .info and history for the watchlist so the first jobs start from the cache"""
+    take_snapshot()
+
+def on_config_change(old, new, added, removed):
+    apply_config(new.config)
+    if added:
+        warm_tickers(added)
+
+def job_settings(name):
+    settings = dict(DEFAULT_JOB_SETTINGS[name])
+    settings.update(SCHEDULER_SETTINGS.get(name) or {})
+    if FAST_DEBUG:
+        settings.update(interval_minutes=5, market_hours_only=False)
+    return settings
 
 # --- Main Execution ---
 
 if __name__ == "__main__":
+    # app_monitoring imports `app`; share this module instead of loading a second copy
+    sys.modules.setdefault('app', sys.modules[__name__])
     from app_monitoring import monitor_etfs, monitor_aum
+    from scheduler import MonitorScheduler
+    from response_cache import cache_settings
     log("✅ ETF Risk Monitor started. Running first scan now...")
-    monitor_etfs()
-    monitor_smart_trims()
-    if FAST_DEBUG:
-        schedule.every(5).minutes.do(monitor_etfs)
-        schedule.every(5).minutes.do(monitor_smart_trims)
-    else:
-        schedule.every(1).hours.do(monitor_etfs)
-        schedule.every(1).hours.do(monitor_smart_trims)
-
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    if cache_settings().get('warm_on_start'):
+        # Jobs asking for the same tickers meanwhile wait on these requests
+        threading.Thread(target=warm_response_cache, name="cache-warm", daemon=True).start()
+    scheduler = MonitorScheduler(log=log)
+    config_service = get_config_service()
+    config_service.log = log
+    config_service.subscribe(on_config_change)
+
+    @config_service.subscribe
+    def reschedule(old, new, added, removed):
+        for name, job in scheduler.jobs.items():
+            if name in DEFAULT_JOB_SETTINGS:
+                settings = job_settings(name)
+                job.interval = settings['interval_minutes'] * 60
+                job.timeout = settings['timeout_seconds']
+                job.market_hours_only = settings['market_hours_only']
+
+    # The scan job also runs the smart trims off its own snapshot
+    jobs = (('scan', monitor_etfs), ('aum', monitor_aum), ('compact', compact_trackers),
+            ('dividends', sync_dividend_history))
+    for name, func in jobs:
+        settings = job_settings(name)
+        scheduler.add_job(
+            name, func,
+            interval=settings['interval_minutes'] * 60,
+            timeout=settings['timeout_seconds'],
+            market_hours_only=settings['market_hours_only'])
+    # Watch config.yaml / portfolio.json; new tickers are warmed inside this job
+    scheduler.add_job('config', config_service.reload, interval=CONFIG_POLL_SECONDS, timeout=900)
+    scheduler.run()
 
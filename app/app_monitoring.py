@@ -0,0 +1,306 @@
+"""Hourly ETF risk scan and daily AUM check, run as a staged pipeline.
+
+``monitor_etfs()`` runs four stages over the watchlist:
+
+1. fetch    - one ``MarketSnapshot`` per batch of ``batch_size`` tickers (one
+              bulk history download, ``.info`` through the fetch executor),
+              until the cycle's time budget is spent
+2. record   - append every NAV and price to the columnar trackers
+3. evaluate - build one metrics table for all fetched tickers (price/NAV
+              deviation, 30-day NAV decay from the tracker, the last
+              completed session's volume against the ticker's own average,
+              principal loss on held positions) and run the compiled
+              ``risk`` rule set over it in one pass
+4. alert    - one digest entry per breach, de-duplicated for 24 hours
+
+The smart-trim check then runs over the same snapshots, so a cycle makes one
+bulk download per batch instead of a second one for the trims.
+
+Tickers the budget did not reach are fetched first next cycle, so a watchlist
+of hundreds is covered across consecutive cycles instead of overrunning the
+job timeout. ``monitor_aum()`` reuses the fetch stage once a day and runs the
+``aum`` rules over total assets, ``aum_thresholds`` and the previous check.
+"""
+import datetime
+import time
+
+import numpy as np
+
+import app
+from config import get_config, get_config_service
+from risk_metrics import compute_risk_metrics
+from scheduler import MARKET_TZ, market_is_open
+from tracker_store import open_tracker
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_TIME_BUDGET = 600  # seconds; the scan job times out at 900 by default
+VOLUME_WINDOW = 20         # trading days in the volume baseline
+NAV_DECAY_DAYS = 30
+DEFAULT_MIN_AUM = 50_000_000
+AUM_CHECK_INTERVAL = datetime.timedelta(hours=24)
+LAST_AUM_CHECK_FILE = 'last_aum_check.txt'
+
+RECOMMENDED_ACTIONS = {
+    'premium_discount': "Check the fund's live NAV before trading; avoid buying at a premium or selling into a deep discount.",
+    'nav_decay': "Compare distributions with NAV erosion; consider trimming or rotating into a steadier fund.",
+    'volume_drop': "Liquidity is thinning: trade with limit orders and watch for closure or delisting notices.",
+    'principal': "Revisit the position size and exit plan; consider a stop or rotating into stronger funds.",
+    'aum_low': "Small funds carry closure risk: check issuer notices and consider reducing exposure.",
+    'aum_watch': "AUM is approaching the closure zone: keep an eye on flows and issuer announcements.",
+    'aum_drop': "Large outflows often precede closures: check fund news and consider reducing exposure.",
+}
+DEFAULT_ACTION = "Review the position against your risk plan."
+
+_deferred = []  # tickers the last scan ran out of budget for
+
+
+def scan_settings():
+    settings = get_config().get('scan_settings', {})
+    return (settings.get('batch_size', DEFAULT_BATCH_SIZE),
+            settings.get('time_budget_seconds', DEFAULT_TIME_BUDGET))
+
+
+def scan_order(watchlist):
+    """Tickers skipped by the last scan first, then the rest of the watchlist"""
+    carried = [t for t in _deferred if t in watchlist]
+    return carried + sorted(set(watchlist) - set(carried))
+
+
+# --- Stage 1: fetch ---
+
+def fetch_stage(tickers, batch_size, deadline):
+    """Fetch snapshots batch by batch until the deadline; returns (snapshots, tickers not reached)"""
+    snapshots = []
+    for start in range(0, len(tickers), batch_size):
+        if time.monotonic() >= deadline:
+            return snapshots, tickers[start:]
+        snapshots.append(app.take_snapshot(tickers[start:start + batch_size]))
+    return snapshots, []
+
+
+# --- Stage 2: record ---
+
+def record_stage(snapshots):
+    for snapshot in snapshots:
+        app.record_snapshot(snapshot)
+
+
+# --- Stage 3: evaluate ---
+
+def _quote_column(snapshots, field):
+    """One quote field for every fetched ticker as a float array (NaN when missing)"""
+    values = []
+    for snapshot in snapshots:
+        read = getattr(snapshot, field)
+        values.extend(read(t) for t in snapshot.tickers)
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _in_progress(index, now):
+    """True when the newest history row is today's session and the market is still open"""
+    if not len(index) or not market_is_open(now) or not hasattr(index[-1], 'date'):
+        return False
+    day = index[-1]
+    if day.tzinfo is not None:
+        day = day.astimezone(MARKET_TZ)
+    return day.date() == now.astimezone(MARKET_TZ).date()
+
+
+def _session_volumes(snapshots, window=VOLUME_WINDOW, now=None):
+    """(last completed session's volume, its average over the `window` sessions before it)
+
+    While the market is open the newest history row is today's partial
+    session; comparing it with full days would flag every ticker each
+    morning, so both figures skip that row. After the close, on weekends and
+    in scans outside market hours the newest row is already complete.
+    """
+    now = now or datetime.datetime.now(MARKET_TZ)
+    rows = sum(len(s.tickers) for s in snapshots)
+    last = np.full(rows, np.nan)
+    matrix = np.full((rows, window), np.nan)
+    row = 0
+    for snapshot in snapshots:
+        for ticker in snapshot.tickers:
+            hist = snapshot.history(ticker)
+            if 'Volume' in hist:
+                volumes = hist['Volume'].to_numpy(dtype=float)
+                if _in_progress(hist.index, now):
+                    volumes = volumes[:-1]
+                if len(volumes):
+                    last[row] = volumes[-1]
+                    baseline = volumes[-window - 1:-1]
+                    if len(baseline):
+                        matrix[row, window - len(baseline):] = baseline
+            row += 1
+    counts = (~np.isnan(matrix)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return last, np.nansum(matrix, axis=1) / counts
+
+
+def build_metrics(snapshots, portfolio, now=None):
+    """The per-cycle metrics table: one array per column, one row per fetched ticker"""
+    tickers = [t for s in snapshots for t in s.tickers]
+    price = _quote_column(snapshots, 'price')
+    nav = _quote_column(snapshots, 'nav')
+    volume, volume_avg = _session_volumes(snapshots, now=now)
+    buy_nav = np.array([portfolio[t]['buy_nav'] if t in portfolio else np.nan for t in tickers], dtype=float)
+    decay = compute_risk_metrics(
+        open_tracker(app.NAV_TRACKER_FILE, 'nav'), open_tracker(app.MARKET_TRACKER_FILE, 'price'),
+        tickers, decay_days=NAV_DECAY_DAYS)['nav_decay_pct']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'ticker': tickers,
+            'price': price,
+            'nav': nav,
+            'premium_pct': (price - nav) / nav * 100,
+            'nav_decay_pct': decay,
+            'volume': volume,
+            'volume_avg': volume_avg,
+            'volume_drop_pct': (volume_avg - volume) / volume_avg * 100,
+            'buy_nav': buy_nav,
+            'loss_pct': (buy_nav - price) / buy_nav * 100,
+        }
+
+
+# --- Stage 4: alert ---
+
+def describe(rule, metrics, i):
+    """One-line summary of a breach for the digest and SMS"""
+    ticker = metrics['ticker'][i]
+    if rule.name == 'premium_discount':
+        side = "premium" if metrics['premium_pct'][i] > 0 else "discount"
+        return (f"{ticker} trades at a {abs(metrics['premium_pct'][i]):.2f}% {side} to NAV "
+                f"(${metrics['price'][i]:.2f} vs ${metrics['nav'][i]:.2f})")
+    if rule.name == 'nav_decay':
+        return f"{ticker} NAV down {-metrics['nav_decay_pct'][i]:.1f}% over {NAV_DECAY_DAYS} days"
+    if rule.name == 'volume_drop':
+        return (f"{ticker} volume {metrics['volume'][i]:,.0f} in the last session was "
+                f"{metrics['volume_drop_pct'][i]:.0f}% below its {VOLUME_WINDOW}-day average {metrics['volume_avg'][i]:,.0f}")
+    if rule.group == 'principal':
+        return (f"{ticker} {rule.name.replace('principal_', '')}: down {metrics['loss_pct'][i]:.1f}% from "
+                f"buy NAV ${metrics['buy_nav'][i]:.2f}")
+    if rule.name == 'aum_low':
+        return f"{ticker} AUM ${metrics['aum'][i]:,.0f} is below ${metrics['min_aum'][i]:,.0f}"
+    if rule.name == 'aum_watch':
+        return f"{ticker} AUM ${metrics['aum'][i]:,.0f} is below its ${metrics['max_aum'][i]:,.0f} watch level"
+    if rule.name == 'aum_drop':
+        return (f"{ticker} AUM fell {metrics['aum_drop_pct'][i]:.0f}% since the last check "
+                f"(${metrics['previous_aum'][i]:,.0f} → ${metrics['aum'][i]:,.0f})")
+    # Rules added in config.yaml describe themselves by their expression
+    return f"{ticker} {rule.name}: {rule.source}"
+
+
+def recommended_action(rule):
+    return (rule.params.get('action') or RECOMMENDED_ACTIONS.get(rule.name)
+            or RECOMMENDED_ACTIONS.get(rule.group) or DEFAULT_ACTION)
+
+
+def alert_stage(hits, metrics, digest):
+    """Queue one digest entry per breach not already sent today; returns the count queued
+
+    The caller flushes the digest with end_cycle() once the whole cycle has
+    been collected.
+    """
+    queued = 0
+    for rule, rows in hits:
+        action = recommended_action(rule)
+        for i in rows:
+            ticker = metrics['ticker'][i]
+            if not app.should_send_alert(app.hash_alert(f"{rule.name}:{ticker}")):
+                continue
+            summary = describe(rule, metrics, i)
+            subject = f"[{rule.name.replace('_', ' ').title()}] {ticker}"
+            body = f"{summary}\n\n✅ Recommended Action:\n{action}"
+            digest.add(ticker, rule.severity, subject, body, summary=summary)
+            queued += 1
+    app.get_alert_dedup().flush()
+    return queued
+
+
+# --- Jobs ---
+
+def monitor_etfs():
+    """Hourly risk scan of the watchlist within the configured time budget"""
+    global _deferred
+    started = time.monotonic()
+    batch_size, budget = scan_settings()
+    snapshot = get_config_service().current()
+    tickers = scan_order(snapshot.watchlist)
+    app.log(f"\n🔍 Scanning {len(tickers)} ETFs (budget {budget}s)...")
+
+    snapshots, _deferred = fetch_stage(tickers, batch_size, started + budget)
+    record_stage(snapshots)
+    breaches = queued = 0
+    digest = app.get_alert_digest('scan')
+    if snapshots:
+        metrics = build_metrics(snapshots, snapshot.portfolio)
+        rules = snapshot.rules['risk']
+        hits = rules.evaluate(metrics)
+        breaches = sum(len(rows) for _, rows in hits)
+        queued = alert_stage(hits, metrics, digest)
+        app.log(f"📏 Risk rules: {rules.summary()}")
+
+        from market_snapshot import MarketSnapshot
+        app.monitor_smart_trims(MarketSnapshot.merge(snapshots), digest)
+    # One digest per receiver for the risk and trim alerts of this cycle
+    digest.end_cycle()
+
+    app.log(f"✅ Scan finished in {time.monotonic() - started:.1f}s: "
+            f"{len(tickers) - len(_deferred)} tickers, {breaches} breaches, {queued} alerts")
+    if _deferred:
+        app.log(f"⏳ Time budget spent; {len(_deferred)} tickers move to the front of the next scan")
+    app.send_heartbeat()
+
+
+def _aum_check_due(now):
+    try:
+        with open(LAST_AUM_CHECK_FILE, 'r') as f:
+            last = datetime.datetime.fromisoformat(f.read().strip())
+    except (OSError, ValueError):
+        return True
+    return now - last >= AUM_CHECK_INTERVAL
+
+
+def monitor_aum():
+    """Daily AUM check against aum_thresholds and the previous reading in aum_tracker.json"""
+    now = datetime.datetime.utcnow()
+    if not app.FAST_DEBUG and not _aum_check_due(now):
+        app.log("🔕 AUM check skipped — last check was less than 24h ago")
+        return
+    started = time.monotonic()
+    batch_size, budget = scan_settings()
+    config = get_config_service().current()
+    tickers = sorted(config.watchlist)
+    app.log(f"\n🏦 Checking AUM for {len(tickers)} ETFs...")
+
+    snapshots, skipped = fetch_stage(tickers, batch_size, started + budget)
+    fetched = [t for s in snapshots for t in s.tickers]
+    aum_tracker = app.load_json(app.AUM_TRACKER_FILE)
+    thresholds = [app.AUM_THRESHOLDS.get(t) or {} for t in fetched]
+    aum = _quote_column(snapshots, 'total_assets')
+    previous = np.array([aum_tracker.get(t, np.nan) for t in fetched], dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics = {
+            'ticker': fetched,
+            'aum': aum,
+            'previous_aum': previous,
+            'aum_drop_pct': (previous - aum) / previous * 100,
+            'min_aum': np.array([b.get('min_aum') or DEFAULT_MIN_AUM for b in thresholds], dtype=float),
+            'max_aum': np.array([b.get('max_aum') or np.nan for b in thresholds], dtype=float),
+        }
+    hits = config.rules['aum'].evaluate(metrics)
+    digest = app.get_alert_digest('aum')
+    queued = alert_stage(hits, metrics, digest) if hits else 0
+    digest.end_cycle()
+
+    for ticker, value in zip(fetched, aum):
+        if not np.isnan(value):
+            aum_tracker[ticker] = int(value)
+    app.save_json(app.AUM_TRACKER_FILE, aum_tracker)
+    if not skipped:
+        with open(LAST_AUM_CHECK_FILE, 'w') as f:
+            f.write(now.isoformat())
+    else:
+        app.log(f"⏳ Time budget spent; {len(skipped)} tickers will be checked on the next run")
+    app.log(f"✅ AUM check finished in {time.monotonic() - started:.1f}s: "
+            f"{sum(len(rows) for _, rows in hits)} breaches, {queued} alerts")
@@ -0,0 +1,155 @@
+"""Indexed, size-bounded article cache in a single SQLite file.
+
+Replaces the one-JSON-file-per-URL ``article_cache/`` directory. Bodies are
+stored zlib-compressed and looked up by URL hash through the primary key, so
+a lookup is one indexed query instead of a stat and a file read. Entries
+expire after ``ttl`` seconds, and once the compressed total exceeds
+``max_bytes`` the least recently used entries are evicted. WAL mode lets the
+dashboard sessions read while the background worker writes.
+"""
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+ARTICLE_CACHE_DB = "article_cache.db"
+LEGACY_CACHE_DIR = "article_cache"
+DEFAULT_TTL = 7 * 24 * 3600  # 7 days in seconds
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    sentiment REAL NOT NULL,
+    cached_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_accessed ON articles (accessed_at);
+CREATE INDEX IF NOT EXISTS articles_cached ON articles (cached_at);
+"""
+
+
+def url_hash(url):
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+class ArticleCache:
+    def __init__(self, path=ARTICLE_CACHE_DB, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def get(self, url):
+        """Return (content, sentiment) if cached and fresh, else None"""
+        now = time.time()
+        key = url_hash(url)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT body, sentiment FROM articles WHERE url_hash = ? AND cached_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.db:
+                self.db.execute("UPDATE articles SET accessed_at = ? WHERE url_hash = ?", (now, key))
+        return zlib.decompress(row[0]).decode('utf-8'), row[1]
+
+    def put(self, url, content, sentiment, cached_at=None):
+        now = time.time()
+        body = zlib.compress(content.encode('utf-8'))
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url_hash(url), url, body, sentiment, cached_at or now, now, len(body)),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones beyond max_bytes"""
+        expired = self.db.execute("DELETE FROM articles WHERE cached_at <= ?", (now - self.ttl,)).rowcount
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        over = total - self.max_bytes
+        lru = 0
+        if over > 0:
+            doomed = []
+            for key, size in self.db.execute("SELECT url_hash, size FROM articles ORDER BY accessed_at"):
+                doomed.append((key,))
+                over -= size
+                if over <= 0:
+                    break
+            self.db.executemany("DELETE FROM articles WHERE url_hash = ?", doomed)
+            lru = len(doomed)
+        self.evictions += expired + lru
+
+    def stats(self):
+        """Entry count, sizes and this process's hit/miss/eviction counters"""
+        with self.lock:
+            entries, stored, oldest = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(cached_at) FROM articles"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'stored_bytes': stored,
+            'max_bytes': self.max_bytes,
+            'oldest_age': time.time() - oldest if oldest else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+        }
+
+    def migrate_directory(self, directory=LEGACY_CACHE_DIR):
+        """Import the legacy per-URL JSON files, then delete them; returns the count"""
+        files = glob.glob(os.path.join(directory, "*.json"))
+        imported = 0
+        for path in files:
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('url') and data.get('content'):
+                    self.put(data['url'], data['content'], data.get('sentiment', 0), os.path.getmtime(path))
+                    imported += 1
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping cached article {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # another process migrated it first
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+        return imported
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_article_cache():
+    """The process-wide article cache, migrating article_cache/ on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArticleCache()
+            if os.path.isdir(LEGACY_CACHE_DIR):
+                imported = _cache.migrate_directory()
+                print(f"📦 Migrated {imported} cached articles into {ARTICLE_CACHE_DB}")
+        return _cache
@@ -0,0 +1,170 @@
+"""Article text extraction with pluggable HTML parsers.
+
+The fastest installed backend is used: selectolax (lexbor), then lxml (with
+cssselect), then BeautifulSoup's html.parser as the always-available
+fallback. Every backend applies the same rules: drop <script>/<style>, try
+the content selectors in order, stop at the first one that yields enough
+text (and stop collecting its matches once MAX_CONTENT_CHARS is reached),
+else fall back to all <p> text. The selector that worked for a domain is
+tried first next time, so most pages match on the first query.
+"""
+import re
+import threading
+from urllib.parse import urlparse
+
+MIN_CONTENT_CHARS = 200
+MAX_CONTENT_CHARS = 20000  # plenty for sentiment and the 500-char summary
+
+CONTENT_SELECTORS = [
+    'article',
+    '[class*="article"]',
+    '[class*="content"]',
+    'main',
+    '.post-content',
+    '#article-body'
+]
+
+WHITESPACE_RE = re.compile(r'\s+')
+DISALLOWED_RE = re.compile(r'[^\w\s.,!?-]')
+
+
+class Extractor:
+    """Backend interface: parse a page and run CSS selectors over it"""
+    name = None
+
+    def parse(self, html):
+        raise NotImplementedError
+
+    def select_texts(self, doc, selector):
+        """Yield the text of each element matching selector"""
+        raise NotImplementedError
+
+    def paragraph_texts(self, doc):
+        return self.select_texts(doc, 'p')
+
+
+class SelectolaxExtractor(Extractor):
+    name = 'selectolax'
+
+    def __init__(self):
+        # The lexbor engine; selectolax 1.0 removed the older `parser` (Modest) module
+        from selectolax.lexbor import LexborHTMLParser
+        self.HTMLParser = LexborHTMLParser
+
+    def parse(self, html):
+        tree = self.HTMLParser(html)
+        tree.strip_tags(['script', 'style'])
+        return tree
+
+    def select_texts(self, doc, selector):
+        for node in doc.css(selector):
+            yield node.text(separator='')
+
+
+class LxmlExtractor(Extractor):
+    name = 'lxml'
+
+    def __init__(self):
+        import cssselect  # noqa: F401 -- lxml's cssselect() needs it
+        import lxml.html
+        self.lxml_html = lxml.html
+
+    def parse(self, html):
+        doc = self.lxml_html.document_fromstring(html)
+        for node in doc.xpath('//script|//style'):
+            node.drop_tree()
+        return doc
+
+    def select_texts(self, doc, selector):
+        for node in doc.cssselect(selector):
+            yield node.text_content()
+
+
+class SoupExtractor(Extractor):
+    name = 'bs4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self.BeautifulSoup = BeautifulSoup
+
+    def parse(self, html):
+        soup = self.BeautifulSoup(html, 'html.parser')
+        for script in soup(['script', 'style']):
+            script.decompose()
+        return soup
+
+    def select_texts(self, doc, selector):
+        for node in doc.select(selector):
+            yield node.get_text()
+
+
+BACKENDS = (SelectolaxExtractor, LxmlExtractor, SoupExtractor)
+
+
+def available_extractors():
+    """Instantiate every backend whose parser is installed, fastest first"""
+    extractors = []
+    for backend in BACKENDS:
+        try:
+            extractors.append(backend())
+        except ImportError:
+            continue
+    return extractors
+
+
+_default = None
+_domain_selectors = {}  # domain -> selector that produced the content last time
+_lock = threading.Lock()
+
+
+def get_extractor():
+    global _default
+    with _lock:
+        if _default is None:
+            _default = available_extractors()[0]
+        return _default
+
+
+def _collect(texts):
+    """Join stripped texts, stopping once MAX_CONTENT_CHARS have been gathered"""
+    parts = []
+    total = 0
+    for text in texts:
+        text = text.strip()
+        parts.append(text)
+        total += len(text) + 1
+        if total >= MAX_CONTENT_CHARS:
+            break
+    return ' '.join(parts)
+
+
+def extract_text(html, url=None, extractor=None):
+    """Return cleaned article text, or '' if the page has too little of it"""
+    extractor = extractor or get_extractor()
+    doc = extractor.parse(html)
+    domain = urlparse(url).netloc if url else None
+
+    selectors = CONTENT_SELECTORS
+    preferred = _domain_selectors.get(domain)
+    if preferred:
+        selectors = [preferred] + [s for s in CONTENT_SELECTORS if s != preferred]
+
+    article_content = ''
+    for selector in selectors:
+        text = _collect(extractor.select_texts(doc, selector))
+        if text:
+            article_content = text
+        if len(text) > MIN_CONTENT_CHARS:
+            if domain:
+                _domain_selectors[domain] = selector
+            break
+
+    # If no content found, try paragraphs
+    if not article_content:
+        article_content = _collect(extractor.paragraph_texts(doc))
+
+    # Clean up the content
+    article_content = WHITESPACE_RE.sub(' ', article_content).strip()
+    article_content = DISALLOWED_RE.sub('', article_content)
+
+    return article_content if len(article_content) > MIN_CONTENT_CHARS else ''
@@ -0,0 +1,107 @@
+"""Process-wide background updates for the dashboard.
+
+Streamlit runs ``dashboard.py`` once per session and rerun, but imported
+modules live for the whole server process, so ``ensure_running()`` starts at
+most one worker thread per process. Across processes (several Streamlit
+servers sharing the app directory) an exclusive ``flock`` on
+``background_service.lock`` elects a single leader; only the leader polls
+Seeking Alpha and publishes to the shared news cache, which sessions
+only read. Followers keep retrying the lock, so one takes over if the leader
+exits.
+
+Every process's worker also picks up config.yaml / portfolio.json edits on
+each pass, so sessions see them without a restart.
+
+News is stale-while-revalidate: pages render whatever is cached and call
+``request_refresh()`` for missing or stale tickers, which wakes the worker
+instead of fetching inside the render.
+"""
+import fcntl
+import os
+import threading
+
+from config import get_config_service, get_portfolio
+import news_service
+from response_cache import cache_settings
+
+LOCK_FILE = "background_service.lock"
+UPDATE_INTERVAL = 60  # seconds between update passes
+
+_start_lock = threading.Lock()
+_worker = None
+_wake = threading.Event()
+
+
+def _acquire_leadership():
+    """Return the open lock file if this process is now the leader, else None"""
+    lock_file = open(LOCK_FILE, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    return lock_file
+
+
+def update_once():
+    """Refresh stale news for the portfolio"""
+    portfolio_data = get_portfolio()
+    if not portfolio_data:
+        return
+    tickers = list(portfolio_data.keys())
+
+    cache = news_service.load_news_cache()
+    news_service.refresh_stale_news(tickers, cache)
+
+
+def warm_quotes():
+    """Prefill the shared response cache with .info for the watchlist"""
+    from market_snapshot import fetch_infos
+
+    tickers = sorted(get_config_service().current().watchlist)
+    fetch_infos(tickers)
+    print(f"🔥 Warmed the response cache for {len(tickers)} tickers")
+
+
+def _run():
+    lock_file = None
+    while True:
+        try:
+            get_config_service().reload()
+            if lock_file is None:
+                lock_file = _acquire_leadership()
+                if lock_file is not None:
+                    print(f"📡 Background updates running in process {os.getpid()}")
+                    if cache_settings().get('warm_on_start'):
+                        warm_quotes()
+            if lock_file is not None:
+                update_once()
+        except Exception as e:
+            print(f"⚠️ Error in background updates: {e}")
+        _wake.wait(UPDATE_INTERVAL)
+        _wake.clear()
+
+
+def ensure_running():
+    """Start the worker thread for this process unless it is already running"""
+    global _worker
+    with _start_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="background-updates", daemon=True)
+            _worker.start()
+    return _worker
+
+
+def request_refresh(tickers):
+    """Ask the worker for a pass now if any of `tickers` has missing or stale news
+
+    Never blocks. In a follower process this only wakes the local thread; the
+    leader picks the tickers up on its next pass because staleness is judged
+    from the shared cache.
+    """
+    if news_service.stale_tickers(tickers, news_service.load_news_cache()):
+        _wake.set()
@@ -0,0 +1,58 @@
+"""Compare article extraction throughput across the installed HTML backends.
+
+Usage: python benchmark_extract.py <corpus_dir> [rounds]
+
+<corpus_dir> holds saved article pages (*.html); ``tests/fixtures/articles``
+has a small one covering each content selector, the <p> fallback, a
+paywalled teaser and a page with a large inline script. Each backend
+extracts every page `rounds` times; the domain selector cache is cleared
+between backends so they start from the same state.
+"""
+import glob
+import os
+import sys
+import time
+
+import article_extract
+
+
+def load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+
+def benchmark(extractor, pages, rounds):
+    article_extract._domain_selectors.clear()
+    found = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            if article_extract.extract_text(page, "https://seekingalpha.com/article", extractor):
+                found += 1
+    elapsed = time.perf_counter() - start
+    return elapsed, found // rounds
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    pages = load_corpus(sys.argv[1])
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    if not pages:
+        sys.exit(f"No *.html files in {sys.argv[1]}")
+
+    megabytes = sum(len(page) for page in pages) / 1e6
+    print(f"📄 {len(pages)} pages, {megabytes:.1f} MB, {rounds} rounds")
+    results = []
+    for extractor in article_extract.available_extractors():
+        elapsed, found = benchmark(extractor, pages, rounds)
+        results.append((extractor.name, len(pages) * rounds / elapsed, megabytes * rounds / elapsed, found))
+
+    # The last backend (bs4, the old code path, when installed) is the baseline
+    baseline = results[-1][1]
+    for name, per_second, mb_per_second, found in results:
+        print(f"{name:>10}: {per_second:8.1f} pages/s  {mb_per_second:6.1f} MB/s  "
+              f"x{per_second / baseline:.1f}  ({found}/{len(pages)} with content)")
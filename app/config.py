@@ -0,0 +1,209 @@
+"""Validated, hot-reloadable view of config.yaml and portfolio.json.
+
+``ConfigService`` parses and validates both files into an immutable
+``ConfigSnapshot`` and swaps in a new snapshot only when a changed file
+validates; a bad edit is logged and the previous snapshot stays live.
+Changes are noticed only by ``reload()``, which the monitor runs as its
+``config`` scheduler job and the dashboard's background worker runs on each
+pass; ``current()`` never touches the files, so other jobs' threads do not
+end up running the subscribers. Subscribers are told which tickers were
+added or removed, so a watchlist edit costs an incremental fetch of the new
+tickers instead of a container restart.
+Each snapshot also carries the threshold rules compiled by ``rule_engine``.
+
+Nothing is read at import time; ``get_config()`` returns the live config dict.
+"""
+import json
+import os
+import threading
+from types import MappingProxyType
+
+import yaml
+
+CONFIG_FILE = 'config.yaml'
+PORTFOLIO_FILE = 'portfolio.json'
+
+REQUIRED_SECTIONS = {
+    'tickers': list,
+    'polygon_api_key': str,
+    'email_settings': dict,
+    'aum_thresholds': dict,
+}
+REQUIRED_EMAIL_SETTINGS = ('smtp_server', 'smtp_port', 'sender_email', 'sender_password', 'receivers')
+OPTIONAL_SECTIONS = {
+    'risk_thresholds': dict,
+    'principal_loss_thresholds': dict,
+    'rules': dict,
+    'heartbeat_url': (str, type(None)),
+    'capital_gains_tax_rate': (int, float),
+    'trim_cooldown_days': (int, float),
+    'fetch_settings': dict,
+    'alert_digest': dict,
+    'tracker_retention': dict,
+    'scheduler': dict,
+    'scan_settings': dict,
+    'response_cache': dict,
+}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def validate_config(data):
+    """Check the shape of a parsed config.yaml; raises ConfigError naming the first problem"""
+    if not isinstance(data, dict):
+        raise ConfigError("config.yaml must be a mapping")
+    for key, kind in REQUIRED_SECTIONS.items():
+        if key not in data:
+            raise ConfigError(f"missing '{key}'")
+        if not isinstance(data[key], kind):
+            raise ConfigError(f"'{key}' must be a {kind.__name__}")
+    for key, kinds in OPTIONAL_SECTIONS.items():
+        if key in data and not isinstance(data[key], kinds):
+            raise ConfigError(f"'{key}' has the wrong type")
+    if not all(isinstance(t, str) and t for t in data['tickers']):
+        raise ConfigError("'tickers' must be a list of symbols")
+    missing = [k for k in REQUIRED_EMAIL_SETTINGS if k not in data['email_settings']]
+    if missing:
+        raise ConfigError(f"email_settings is missing {', '.join(missing)}")
+    if not isinstance(data['email_settings']['receivers'], list):
+        raise ConfigError("email_settings.receivers must be a list")
+    for section in ('risk_thresholds', 'principal_loss_thresholds'):
+        for name, value in data.get(section, {}).items():
+            if not isinstance(value, (int, float)):
+                raise ConfigError(f"{section}.{name} must be a number")
+    for ticker, bounds in data['aum_thresholds'].items():
+        if not isinstance(bounds, dict) or not all(isinstance(v, (int, float, type(None))) for v in bounds.values()):
+            raise ConfigError(f"aum_thresholds.{ticker} must map min_aum/max_aum to numbers")
+    return data
+
+
+def validate_portfolio(data):
+    """Check portfolio.json: {ticker: {"shares": n, "buy_nav": x, ...}}"""
+    if not isinstance(data, dict):
+        raise ConfigError("portfolio.json must be an object keyed by ticker")
+    for ticker, position in data.items():
+        if not isinstance(position, dict):
+            raise ConfigError(f"portfolio position {ticker} must be an object")
+        for field in ('shares', 'buy_nav'):
+            if not isinstance(position.get(field), (int, float)):
+                raise ConfigError(f"portfolio {ticker}.{field} must be a number")
+    return data
+
+
+def _file_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ConfigSnapshot:
+    """One validated version of the config and portfolio; never mutated after creation"""
+
+    def __init__(self, config, portfolio, keys, version, rules=None):
+        self.config = config
+        self.portfolio = MappingProxyType(portfolio)
+        self.keys = keys
+        self.version = version
+        self.rules = rules or {}  # rule set name -> compiled RuleSet
+
+    @property
+    def tickers(self):
+        return self.config['tickers']
+
+    @property
+    def watchlist(self):
+        """Every ticker the monitor fetches: the configured list plus held positions"""
+        return set(self.config['tickers']) | set(self.portfolio)
+
+
+class ConfigService:
+    def __init__(self, config_file=CONFIG_FILE, portfolio_file=PORTFOLIO_FILE, log=print):
+        self.config_file = config_file
+        self.portfolio_file = portfolio_file
+        self.log = log
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.rejected_keys = None
+        self.snapshot = self._load()  # the first load must succeed
+
+    def _keys(self):
+        return _file_key(self.config_file), _file_key(self.portfolio_file)
+
+    def _load(self, version=1):
+        from rule_engine import compile_rule_sets
+
+        keys = self._keys()
+        with open(self.config_file, 'r') as file:
+            config = validate_config(yaml.safe_load(file))
+        portfolio = {}
+        if keys[1] is not None:
+            with open(self.portfolio_file, 'r') as file:
+                portfolio = validate_portfolio(json.load(file))
+        # Rules are compiled once per version; a rule that fails to compile rejects the edit
+        return ConfigSnapshot(config, portfolio, keys, version, compile_rule_sets(config))
+
+    def current(self):
+        """The live snapshot, as of the last reload()"""
+        return self.snapshot
+
+    def reload(self):
+        """Re-read changed files; returns True if a new snapshot was swapped in"""
+        with self.lock:
+            old = self.snapshot
+            keys = self._keys()
+            if keys == old.keys or keys == self.rejected_keys:
+                return False
+            try:
+                new = self._load(old.version + 1)
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                # Remember the bad version so it is reported once, not on every check
+                self.rejected_keys = keys
+                self.log(f"⚠️ Config change rejected, keeping version {old.version}: {e}")
+                return False
+            self.snapshot = new
+        added = new.watchlist - old.watchlist
+        removed = old.watchlist - new.watchlist
+        self.log(f"🔁 Config reloaded (version {new.version}): "
+                 f"{len(added)} tickers added, {len(removed)} removed")
+        for callback in list(self.subscribers):
+            try:
+                callback(old, new, added, removed)
+            except Exception as e:
+                self.log(f"❌ Config subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+        return True
+
+    def subscribe(self, callback):
+        """Call callback(old, new, added, removed) after every successful reload"""
+        self.subscribers.append(callback)
+        return callback
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_config_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConfigService()
+        return _service
+
+
+def get_config():
+    """The live config.yaml contents"""
+    return get_config_service().current().config
+
+
+def get_rules(name):
+    """The live compiled rule set (risk, aum, trim or rotation)"""
+    return get_config_service().current().rules[name]
+
+
+def get_portfolio():
+    """The live portfolio.json contents (read-only)"""
+    return get_config_service().current().portfolio
@@ -1,37 +1,21 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import datetime
 import pytz
 import numpy as np
-from app import load_json, TICKERS, RISK_THRESHOLDS
-import feedparser
-from textblob import TextBlob
-import requests
-from bs4 import BeautifulSoup
-import time
-import re
+from config import get_config, get_config_service
+from data_cache import load_json_cached, tracker, store_version, cached_compute
+from risk_metrics import compute_risk_metrics, load_matrix, drop_counts
+from news_service import NEWS_CACHE_FILE
+from article_cache import get_article_cache
+import background_service
+import dividend_history
+import sentiment
 from calendar import monthrange
 from datetime import timedelta
-import threading
-import json
-import os
-from pathlib import Path
-import yfinance as yf
-import hashlib
 
 # --- Constants ---
-NEWS_CACHE_FILE = "news_cache.json"
-ARTICLE_CACHE_DIR = "article_cache"
-DIVIDEND_HISTORY_DIR = "dividend_history"
-NEWS_UPDATE_INTERVAL = 3600  # 1 hour in seconds
-ARTICLE_CACHE_DURATION = 7 * 24 * 3600  # 7 days in seconds
-TICKER_DELAY = 3  # seconds between ticker updates
-DIVIDEND_UPDATE_INTERVAL = 7 * 24 * 3600  # 7 days in seconds
-MAX_DIVIDEND_RETRIES = 3  # Maximum number of retries for dividend fetching
-MAX_RETRIES = 3
-
+NEWS_PANEL_REFRESH = 30  # seconds between news panel reruns
 # Color constants for position status
 COLORS = {
     'healthy': {
@@ -52,10 +36,6 @@ COLORS = {
     }
 }
 
-# Ensure cache directories exist
-os.makedirs(ARTICLE_CACHE_DIR, exist_ok=True)
-os.makedirs(DIVIDEND_HISTORY_DIR, exist_ok=True)
-
 # --- Page Config ---
 st.set_page_config(
     page_title="YieldMax ETF Risk Dashboard",
@@ -175,14 +155,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Helper Functions ---
-def calculate_nav_stability(nav_history, window=5):
-    """Calculate NAV stability score based on recent trend"""
-    if len(nav_history) < window:
-        return 0
-    
-    recent_navs = [entry['nav'] for entry in nav_history[-window:]]
-    consecutive_drops = sum(1 for i in range(len(recent_navs)-1) if recent_navs[i] > recent_navs[i+1])
-    return consecutive_drops / (window - 1)  # Normalize to 0-1
+def calculate_nav_stability(tickers, window=5):
+    """Calculate NAV stability scores (share of drops in the recent trend) for tickers"""
+    recent_navs = load_matrix(nav_tracker, tickers, window)
+    enough_history = ~np.isnan(recent_navs[:, 0])
+    return np.where(enough_history, drop_counts(recent_navs, window) / (window - 1), 0)  # Normalize to 0-1
 
 def calculate_aum_risk(aum, threshold=50_000_000):
     """Calculate AUM risk score based on size"""
@@ -199,375 +176,38 @@ def get_risk_color(value):
     return "green"
 
 def get_sentiment_score(text):
-    """Calculate sentiment score from text using TextBlob"""
-    blob = TextBlob(text)
-    return blob.sentiment.polarity
-
-
-
-# --- Cache Management ---
-def load_news_cache():
-    """Load the news cache from file"""
-    try:
-        if os.path.exists(NEWS_CACHE_FILE):
-            with open(NEWS_CACHE_FILE, 'r') as f:
-                cache = json.load(f)
-                # Convert timestamp strings to datetime objects
-                for ticker in cache:
-                    cache[ticker]['last_update'] = datetime.datetime.fromisoformat(cache[ticker]['last_update'])
-                return cache
-        return {}
-    except Exception as e:
-        st.warning(f"Error loading news cache: {str(e)}")
-        return {}
-
-def save_news_cache(cache):
-    """Save the news cache to file"""
-    try:
-        # Convert datetime objects to ISO format strings
-        cache_copy = {}
-        for ticker in cache:
-            cache_copy[ticker] = cache[ticker].copy()
-            cache_copy[ticker]['last_update'] = cache[ticker]['last_update'].isoformat()
-        
-        with open(NEWS_CACHE_FILE, 'w') as f:
-            json.dump(cache_copy, f)
-    except Exception as e:
-        st.warning(f"Error saving news cache: {str(e)}")
-
-def get_cached_article_content(url):
-    """Get article content from cache or fetch if needed"""
-    try:
-        # Create a unique filename from the URL
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        cache_file = os.path.join(ARTICLE_CACHE_DIR, f"{url_hash}.json")
-        
-        # Check if we have a cached version
-        if os.path.exists(cache_file):
-            file_age = time.time() - os.path.getmtime(cache_file)
-            if file_age < ARTICLE_CACHE_DURATION:
-                with open(cache_file, 'r') as f:
-                    cached_data = json.load(f)
-                return cached_data.get('content', ''), cached_data.get('sentiment', 0)
-        
-        # If not cached or too old, fetch new content
-        content = fetch_article_content(url)
-        if content:
-            sentiment = analyze_article_sentiment(content)
-            
-            # Cache the result
-            cache_data = {
-                'url': url,
-                'content': content,
-                'sentiment': sentiment,
-                'cached_at': datetime.datetime.now(pacific_tz).isoformat()
-            }
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
-            
-            return content, sentiment
-        
-        return '', 0
-        
-    except Exception as e:
-        st.warning(f"Error getting article content: {str(e)}")
-        return '', 0
-
-def fetch_article_content(url):
-    """Fetch and extract article content with rate limiting"""
-    try:
-        # Check rate limiting
-        if hasattr(st.session_state, 'article_requests'):
-            if st.session_state.article_requests.get('count', 0) >= 10:  # Max 10 requests per hour
-                last_request = st.session_state.article_requests.get('last_time', 0)
-                if time.time() - last_request < 3600:  # If less than an hour has passed
-                    return ''
-                st.session_state.article_requests['count'] = 0
-        else:
-            st.session_state.article_requests = {'count': 0, 'last_time': time.time()}
-
-        # Increment request counter
-        st.session_state.article_requests['count'] += 1
-        st.session_state.article_requests['last_time'] = time.time()
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(['script', 'style']):
-            script.decompose()
-        
-        # Find the main article content
-        article_content = ''
-        
-        # Try different common article content selectors
-        content_selectors = [
-            'article',
-            '[class*="article"]',
-            '[class*="content"]',
-            'main',
-            '.post-content',
-            '#article-body'
-        ]
-        
-        for selector in content_selectors:
-            content = soup.select(selector)
-            if content:
-                article_content = ' '.join(p.get_text().strip() for p in content)
-                if len(article_content) > 200:  # Minimum content length
-                    break
-        
-        # If no content found, try paragraphs
-        if not article_content:
-            paragraphs = soup.find_all('p')
-            article_content = ' '.join(p.get_text().strip() for p in paragraphs)
-        
-        # Clean up the content
-        article_content = re.sub(r'\s+', ' ', article_content).strip()
-        article_content = re.sub(r'[^\w\s.,!?-]', '', article_content)
-        
-        return article_content if len(article_content) > 200 else ''
-        
-    except Exception as e:
-        st.warning(f"Error fetching article content: {str(e)}")
-        return ''
+    """Calculate sentiment score from text (memoized by content hash)"""
+    return sentiment.score_text(text)
 
-def analyze_article_sentiment(content):
-    """Analyze sentiment of article content"""
-    try:
-        if not content:
-            return 0
-            
-        # Split content into chunks to handle long articles
-        chunk_size = 1000
-        chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
-        
-        # Analyze sentiment for each chunk
-        sentiments = []
-        for chunk in chunks:
-            blob = TextBlob(chunk)
-            sentiments.append(blob.sentiment.polarity)
-        
-        # Return average sentiment
-        return sum(sentiments) / len(sentiments) if sentiments else 0
-        
-    except Exception as e:
-        st.warning(f"Error analyzing sentiment: {str(e)}")
-        return 0
 
-def update_news_for_ticker(ticker, cache):
-    """Update news for a single ticker"""
-    try:
-        xml_url = f"https://seekingalpha.com/api/sa/combined/{ticker}.xml"
-        feed = feedparser.parse(xml_url)
-        
-        if feed.entries:
-            latest = feed.entries[0]
-            
-            # Clean up the title
-            title = re.sub(r'<[^>]+>', '', latest.title)
-            title = ' '.join(title.split())
-            
-            # Get the link and fetch article content
-            link = latest.link
-            content, sentiment_score = get_cached_article_content(link)
-            
-            # Get the publication date
-            pub_date = datetime.datetime(*latest.published_parsed[:6])
-            pacific_date = pub_date.astimezone(pacific_tz)
-            
-            cache[ticker] = {
-                'title': title,
-                'link': link,
-                'date': pacific_date.strftime('%Y-%m-%d'),
-                'sentiment': sentiment_score,
-                'content_summary': content[:500] + '...' if len(content) > 500 else content,
-                'last_update': datetime.datetime.now(pacific_tz)
-            }
-        else:
-            cache[ticker] = {
-                'title': f"No recent news available for {ticker}",
-                'link': f"https://seekingalpha.com/symbol/{ticker}",
-                'date': datetime.datetime.now(pacific_tz).strftime('%Y-%m-%d'),
-                'sentiment': 0,
-                'content_summary': '',
-                'last_update': datetime.datetime.now(pacific_tz)
-            }
-        
-        save_news_cache(cache)
-        return True
-    except Exception as e:
-        st.warning(f"Error updating news for {ticker}: {str(e)}")
-        return False
 
-@st.cache_data(ttl=24*3600)  # Cache for 24 hours
 def get_dividend_history(ticker):
-    """Get dividend history from cache, only fetch from API if absolutely necessary"""
+    """Get dividend history from the consolidated store kept current by the monitor's sync job"""
     try:
-        file_path = os.path.join(DIVIDEND_HISTORY_DIR, f"{ticker}.json")
-        
-        # Check if file exists and is recent enough
-        if os.path.exists(file_path):
-            file_age = time.time() - os.path.getmtime(file_path)
-            
-            # Load from file if it's newer than DIVIDEND_UPDATE_INTERVAL
-            if file_age < DIVIDEND_UPDATE_INTERVAL:
-                with open(file_path, 'r') as f:
-                    return json.load(f)
-            
-            # If file exists but is old, load it anyway but mark for update
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                if data:  # If we have any data, use it
-                    st.session_state.setdefault('dividend_update_queue', set()).add(ticker)
-                    return data
-        
-        # If we get here, we need to fetch from API
-        return fetch_dividend_data(ticker)
-    
+        return dividend_history.load_dividend_history(ticker) or []
     except Exception as e:
         st.warning(f"Error loading dividend history for {ticker}: {str(e)}")
         return []
 
-def fetch_dividend_data(ticker):
-    """Fetch dividend data from YFinance with retries and rate limiting"""
-    try:
-        # Check if we've exceeded API calls
-        if hasattr(st.session_state, 'yf_api_calls'):
-            if st.session_state.yf_api_calls.get('count', 0) >= 5:  # Max 5 calls per session
-                last_call = st.session_state.yf_api_calls.get('last_time', 0)
-                if time.time() - last_call < 3600:  # If less than an hour has passed
-                    return []
-                st.session_state.yf_api_calls['count'] = 0
-        else:
-            st.session_state.yf_api_calls = {'count': 0, 'last_time': time.time()}
-
-        # Increment API call counter
-        st.session_state.yf_api_calls['count'] += 1
-        st.session_state.yf_api_calls['last_time'] = time.time()
+# One update worker per server process (and one leader across processes)
+# refreshes the news cache; sessions only read it.
+background_service.ensure_running()
 
-        file_path = os.path.join(DIVIDEND_HISTORY_DIR, f"{ticker}.json")
-        
-        # Load existing data if any
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                existing_data = json.load(f)
-        
-        # Get the last dividend date if we have data
-        last_date = None
-        if existing_data:
-            last_date = datetime.datetime.strptime(
-                max(d['date'] for d in existing_data),
-                '%Y-%m-%d'
-            ).date()
-        
-        # Only fetch new data if necessary
-        stock = yf.Ticker(ticker)
-        if last_date:
-            # Only get dividends since last known date
-            dividends = stock.dividends.loc[last_date:]
-        else:
-            # Get all dividends if we have no data
-            dividends = stock.dividends
-        
-        if dividends is not None and not dividends.empty:
-            # Convert dividends to list of dicts
-            new_data = []
-            for date, amount in dividends.items():
-                div_date = date.date()
-                if not last_date or div_date > last_date:
-                    new_data.append({
-                        'date': div_date.strftime('%Y-%m-%d'),
-                        'amount': float(amount)
-                    })
-            
-            # Combine and sort data
-            all_data = existing_data + new_data
-            all_data.sort(key=lambda x: x['date'])
-            
-            # Save to file
-            with open(file_path, 'w') as f:
-                json.dump(all_data, f, indent=2)
-            
-            return all_data
-        
-        return existing_data or []
-    
-    except Exception as e:
-        st.warning(f"Error fetching dividend data for {ticker}: {str(e)}")
-        return existing_data if existing_data else []
-
-def process_dividend_update_queue():
-    """Process queued dividend updates in background"""
-    if hasattr(st.session_state, 'dividend_update_queue'):
-        update_queue = st.session_state.dividend_update_queue
-        if update_queue:
-            ticker = update_queue.pop()
-            fetch_dividend_data(ticker)
-
-def background_updates():
-    """Combined background thread for news and dividend updates"""
-    while True:
-        try:
-            # Update news
-            cache = load_news_cache()
-            portfolio_data = load_json("portfolio.json")
-            if portfolio_data:
-                tickers = list(portfolio_data.keys())
-                
-                for ticker in tickers:
-                    current_time = datetime.datetime.now(pacific_tz)
-                    
-                    # Check if ticker needs news update
-                    if (ticker not in cache or 
-                        (current_time - cache[ticker]['last_update']).total_seconds() >= NEWS_UPDATE_INTERVAL):
-                        update_news_for_ticker(ticker, cache)
-                        time.sleep(TICKER_DELAY)
-            
-            # Process one dividend update from queue if any
-            process_dividend_update_queue()
-            
-            time.sleep(60)  # Check for updates every minute
-            
-        except Exception as e:
-            st.warning(f"Error in background updates: {str(e)}")
-            time.sleep(60)  # Wait before retrying
-
-# Replace the old background thread initialization
-if 'background_updater' not in st.session_state:
-    updater = threading.Thread(target=background_updates, daemon=True)
-    updater.start()
-    st.session_state['background_updater'] = updater
-
-# Replace the old fetch_seeking_alpha_news function
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def fetch_seeking_alpha_news(tickers):
-    """Get news items from cache with Streamlit caching"""
+    """Get news items from the shared news cache without waiting on any fetch
+
+    Missing or stale tickers are handed to the background worker; the news
+    panel picks up its results on the next refresh.
+    """
     try:
-        cache = load_news_cache()
+        background_service.request_refresh(tickers)
+        cache = load_json_cached(NEWS_CACHE_FILE)
         news_items = []
-        current_time = datetime.datetime.now(pacific_tz)
         
-        # Load portfolio data
-        portfolio_data = load_json("portfolio.json")
-        if not portfolio_data:
-            return []
-            
-        for ticker in portfolio_data.keys():
-            # If ticker not in cache or cache is old, update immediately
-            if (ticker not in cache or 
-                (current_time - cache[ticker]['last_update']).total_seconds() >= NEWS_UPDATE_INTERVAL):
-                if update_news_for_ticker(ticker, cache):
-                    time.sleep(TICKER_DELAY)
-            
+        for ticker in tickers:
             # Add to news items
             if ticker in cache:
-                item = cache[ticker].copy()
+                item = dict(cache[ticker])
                 item['ticker'] = ticker
                 news_items.append(item)
         
@@ -584,7 +224,55 @@ def get_sentiment_color(score):
         return "#dc3545"  # Red
     return "#ffc107"  # Yellow
 
+@st.fragment(run_every=NEWS_PANEL_REFRESH)
+def render_news_panel(tickers):
+    """News with sentiment analysis; reruns on its own to show refreshed items"""
+    news_items = fetch_seeking_alpha_news(tickers)
+    
+    for item in news_items:
+        sentiment_color = get_sentiment_color(item['sentiment'])
+        sentiment_label = "Positive" if item['sentiment'] > 0.2 else "Negative" if item['sentiment'] < -0.2 else "Neutral"
+        
+        st.markdown(f"""
+        <div style='border-left: 4px solid {sentiment_color}; 
+                    padding: 10px; 
+                    margin-bottom: 10px; 
+                    background-color: rgba(76, 86, 106, 0.2); 
+                    border-radius: 0 10px 10px 0;'>
+            <div style='display: flex; justify-content: space-between; align-items: center;'>
+                <span style='color: #88C0D0; font-size: 12px;'>{item['ticker']} | {sentiment_label}</span>
+                <span style='color: #4C566A; font-size: 12px;'>{item['date']}</span>
+            </div>
+            <a href='{item['link']}' 
+               target='_blank' 
+               style='color: #D8DEE9; 
+                      text-decoration: none; 
+                      font-weight: 600; 
+                      display: block; 
+                      margin: 5px 0;'>{item['title']}</a>
+        </div>
+        """, unsafe_allow_html=True)
+    pending = len(tickers) - len(news_items)
+    if pending:
+        st.caption(f"⏳ Fetching news for {pending} more position{'s' if pending != 1 else ''}...")
+
+    stats = get_article_cache().stats()
+    hit_rate = f"{stats['hit_rate']:.0%}" if stats['hit_rate'] is not None else "n/a"
+    st.caption(
+        f"📦 Article cache: {stats['entries']} articles, "
+        f"{stats['stored_bytes'] / 1e6:.1f} / {stats['max_bytes'] / 1e6:.0f} MB, "
+        f"hit rate {hit_rate}, {stats['evictions']} evicted"
+    )
+
 def analyze_dividend_history(ticker):
+    """Dividend forecast for a ticker, computed once per version of its history"""
+    return cached_compute(
+        ('dividend_forecast', ticker),
+        dividend_history.history_version(ticker),
+        lambda: forecast_dividends(ticker),
+    )
+
+def forecast_dividends(ticker):
     """Analyze dividend history to predict next payout"""
     try:
         # Get dividend history with caching
@@ -694,7 +382,9 @@ def create_upcoming_payments_widget(calendar_data):
 
 def create_dividend_forecast_section(portfolio):
     """Create the dividend forecast section"""
-    metrics = calculate_portfolio_dividend_metrics(portfolio)
+    # One forecast per ticker feeds the income metrics, yield and calendar
+    forecasts = {ticker: analyze_dividend_history(ticker) for ticker in portfolio}
+    metrics = calculate_portfolio_dividend_metrics(portfolio, forecasts)
     
     # Generate calendar data
     calendar_data = []
@@ -708,7 +398,7 @@ def create_dividend_forecast_section(portfolio):
         days_in_month = monthrange(current_month.year, current_month.month)[1]
         
         for ticker, position in portfolio.items():
-            div_history = analyze_dividend_history(ticker)
+            div_history = forecasts[ticker]
             if div_history and div_history['next_date']:
                 next_date = div_history['next_date']
                 if (next_date.year == current_month.year and 
@@ -731,7 +421,7 @@ def create_dividend_forecast_section(portfolio):
 
     return metrics, calendar_data
 
-def calculate_portfolio_dividend_metrics(portfolio):
+def calculate_portfolio_dividend_metrics(portfolio, forecasts):
     """Calculate portfolio-wide dividend metrics with trends"""
     total_monthly = 0
     total_weekly = 0
@@ -741,7 +431,7 @@ def calculate_portfolio_dividend_metrics(portfolio):
     dividend_positions = 0
     
     for ticker in portfolio.keys():
-        forecast = analyze_dividend_history(ticker)
+        forecast = forecasts[ticker]
         if forecast:
             shares = portfolio[ticker]['shares']
             monthly = forecast['monthly_total'] * shares
@@ -823,7 +513,7 @@ def create_position_table(positions, status, color_key, action_text):
         gain_pct = pos['gain_pct']
         
         # Get latest NAV from tracker
-        latest_nav = nav_tracker.get(pos['ticker'], [])[-1]['nav'] if nav_tracker.get(pos['ticker'], []) else None
+        latest_nav = nav_tracker.last_value(pos['ticker'])
         
         # Calculate premium/discount to NAV
         nav_premium_pct = ((current_price - latest_nav) / latest_nav * 100) if latest_nav else None
@@ -895,10 +585,10 @@ def create_position_table(positions, status, color_key, action_text):
         )
 
 # --- Load All Data ---
-nav_tracker = load_json("nav_tracker.json")
-market_tracker = load_json("market_price_tracker.json")
-aum_tracker = load_json("aum_tracker.json")
-portfolio = load_json("portfolio.json")
+# Shared across reruns and sessions; files are only re-read when they change
+nav_tracker = tracker("nav_tracker.json", "nav")
+market_tracker = tracker("market_price_tracker.json", "price")
+portfolio = get_config_service().current().portfolio  # validated, swapped on reload like the monitor's
 
 # --- Header ---
 st.title("🎯 YieldMax ETF Risk Dashboard")
@@ -922,8 +612,8 @@ monitor_positions = []  # 5-15% gain
 high_risk_positions = []  # <5% gain
 
 for ticker, position in portfolio.items():
-    if ticker in market_tracker and market_tracker[ticker]:
-        current_price = market_tracker[ticker][-1]['price']
+    current_price = market_tracker.last_value(ticker)
+    if current_price is not None:
         shares = position['shares']
         buy_nav = position['buy_nav']
         
@@ -1042,33 +732,7 @@ with news_col:
     </div>
     """, unsafe_allow_html=True)
 
-    # Display news with sentiment analysis
-    tickers_list = list(portfolio.keys())
-    news_items = fetch_seeking_alpha_news(tickers_list)
-    
-    for item in news_items:
-        sentiment_color = get_sentiment_color(item['sentiment'])
-        sentiment_label = "Positive" if item['sentiment'] > 0.2 else "Negative" if item['sentiment'] < -0.2 else "Neutral"
-        
-        st.markdown(f"""
-        <div style='border-left: 4px solid {sentiment_color}; 
-                    padding: 10px; 
-                    margin-bottom: 10px; 
-                    background-color: rgba(76, 86, 106, 0.2); 
-                    border-radius: 0 10px 10px 0;'>
-            <div style='display: flex; justify-content: space-between; align-items: center;'>
-                <span style='color: #88C0D0; font-size: 12px;'>{item['ticker']} | {sentiment_label}</span>
-                <span style='color: #4C566A; font-size: 12px;'>{item['date']}</span>
-            </div>
-            <a href='{item['link']}' 
-               target='_blank' 
-               style='color: #D8DEE9; 
-                      text-decoration: none; 
-                      font-weight: 600; 
-                      display: block; 
-                      margin: 5px 0;'>{item['title']}</a>
-        </div>
-        """, unsafe_allow_html=True)
+    render_news_panel(list(portfolio.keys()))
 
 # Add explanatory notes at the bottom
 st.markdown("""
@@ -1087,48 +751,29 @@ st.markdown("""
 # --- Risk Analysis Heatmap ---
 st.header("🔥 Risk Analysis Matrix")
 
-# Create meaningful risk metrics for each position
-risk_data = []
-for ticker in TICKERS:
-    if ticker in market_tracker and market_tracker[ticker]:
-        current_price = market_tracker[ticker][-1]['price']
-        nav_history = nav_tracker.get(ticker, [])
-        latest_nav = nav_history[-1]['nav'] if nav_history else None
-        
-        if latest_nav:
-            # Calculate risk metrics
-            nav_premium = ((current_price - latest_nav) / latest_nav * 100)
-            
-            # NAV Stability (based on last 5 days of data)
-            recent_navs = [entry['nav'] for entry in nav_history[-5:]]
-            nav_volatility = np.std(recent_navs) / np.mean(recent_navs) * 100 if len(recent_navs) >= 5 else 0
-            
-            # Price Momentum (5-day trend)
-            price_history = [entry['price'] for entry in market_tracker[ticker][-5:]]
-            price_momentum = ((price_history[-1] - price_history[0]) / price_history[0] * 100) if len(price_history) >= 5 else 0
-            
-            # Portfolio Position
-            in_portfolio = ticker in portfolio
-            if in_portfolio:
-                position = portfolio[ticker]
-                gain_pct = ((current_price - position['buy_nav']) / position['buy_nav'] * 100)
-                position_size = position['shares'] * current_price
-            else:
-                gain_pct = 0
-                position_size = 0
-            
-            risk_data.append({
-                'Ticker': ticker,
-                'NAV Premium': nav_premium,
-                'NAV Volatility': nav_volatility,
-                'Price Momentum': price_momentum,
-                'Position Size': position_size,
-                'Gain/Loss': gain_pct if in_portfolio else None
-            })
-
-# Convert to DataFrame for heatmap
-risk_df = pd.DataFrame(risk_data)
-risk_df = risk_df.set_index('Ticker')
+# Imported here so everything above renders before plotly loads
+import plotly.graph_objects as go
+
+# Compute risk metrics for every tracked ticker in one vectorized pass
+risk_tickers = [t for t in get_config()['tickers'] if t in market_tracker and t in nav_tracker]
+risk = cached_compute(
+    'risk_matrix',
+    (tuple(risk_tickers), store_version(nav_tracker, risk_tickers), store_version(market_tracker, risk_tickers)),
+    lambda: compute_risk_metrics(nav_tracker, market_tracker, risk_tickers, window=5))
+
+# Portfolio positions (NaN for watchlist-only tickers)
+buy_navs = np.array([portfolio[t]['buy_nav'] if t in portfolio else np.nan for t in risk_tickers])
+shares_held = np.array([portfolio[t]['shares'] if t in portfolio else 0 for t in risk_tickers])
+
+risk_df = pd.DataFrame({
+    'NAV Premium': risk['premium_pct'],
+    # NAV Stability and Price Momentum are 0 until 5 points of history exist
+    'NAV Volatility': np.nan_to_num(risk['nav_volatility']),
+    'Price Momentum': np.nan_to_num(risk['price_momentum']),
+    'Position Size': shares_held * risk['price'],
+    'Gain/Loss': (risk['price'] - buy_navs) / buy_navs * 100,
+}, index=pd.Index(risk_tickers, name='Ticker'))
+risk_df = risk_df[risk['nav'] != 0]
 
 # Create heatmap
 fig = go.Figure()
@@ -0,0 +1,74 @@
+"""Process-wide data cache for the dashboard.
+
+Streamlit re-executes ``dashboard.py`` on every rerun, but imported modules
+persist for the life of the server process, so the cache lives here. JSON
+files are re-parsed only when their (mtime, size) changes, and the parsed
+data is frozen into read-only mappings/tuples so every session can share the
+same objects safely. Tracker stores are shared through ``open_tracker``;
+their memory maps only page in the tail the monitor has appended.
+"""
+import json
+import os
+import threading
+from types import MappingProxyType
+
+from tracker_store import open_tracker
+
+_files = {}     # path -> (file key, frozen data)
+_computed = {}  # name -> (version, result)
+_lock = threading.Lock()
+
+
+def file_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def freeze(data):
+    """Recursively convert dicts/lists into read-only mappings and tuples"""
+    if isinstance(data, dict):
+        return MappingProxyType({k: freeze(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(v) for v in data)
+    return data
+
+
+def load_json_cached(path):
+    """Return the parsed, frozen contents of a JSON file, re-reading only when it changes"""
+    key = file_key(path)
+    with _lock:
+        cached = _files.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+    data = {}
+    if key is not None:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    frozen = freeze(data)
+    with _lock:
+        _files[path] = (key, frozen)
+    return frozen
+
+
+def tracker(json_file, value_key):
+    return open_tracker(json_file, value_key)
+
+
+def store_version(store, tickers):
+    """Cheap version stamp for a set of series; changes whenever any of them is written"""
+    return tuple(store.version(ticker) for ticker in tickers)
+
+
+def cached_compute(name, version, compute):
+    """Memoize compute() under `name` until `version` changes"""
+    with _lock:
+        cached = _computed.get(name)
+        if cached and cached[0] == version:
+            return cached[1]
+    result = compute()
+    with _lock:
+        _computed[name] = (version, result)
+    return result
@@ -0,0 +1,138 @@
+"""Consolidated dividend history for every ticker.
+
+All dividends live in one columnar ``TrackerStore`` (``dividends.store/``:
+per ticker, ex-date as UTC-midnight epoch seconds -> amount per share).
+``sync_dividends()`` fetches every ticker in a single multi-ticker
+``yf.download(actions=True)`` request, starting from the oldest last-known
+ex-date, and appends only dividends newer than each ticker's last one;
+tickers with a fresh series in the response cache are not re-downloaded. The
+sync runs from the monitor's scheduler or as ``python dividend_history.py``,
+never inside Streamlit; the dashboard only reads. The legacy
+``dividend_history/<TICKER>.json`` files are imported on first open.
+"""
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+
+from fetch_engine import get_executor, YAHOO
+from response_cache import get_response_cache
+from tracker_store import TrackerStore, to_epoch, from_epoch
+
+DIVIDEND_STORE = "dividends.store"
+LEGACY_DIVIDEND_DIR = "dividend_history"
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _migrate_legacy(path, legacy_dir):
+    """Build the store from dividend_history/*.json in a temp dir, then swap it in"""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    store = TrackerStore(tmp_path, "amount")
+    for file_path in sorted(glob.glob(os.path.join(legacy_dir, "*.json"))):
+        ticker = os.path.splitext(os.path.basename(file_path))[0]
+        with open(file_path, 'r') as f:
+            entries = sorted(json.load(f), key=lambda d: d['date'])
+        if entries:
+            store.append_many(ticker, [to_epoch(d['date']) for d in entries], [d['amount'] for d in entries])
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process finished the migration first.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def open_dividend_store(path=DIVIDEND_STORE, legacy_dir=LEGACY_DIVIDEND_DIR):
+    global _store
+    with _store_lock:
+        if _store is None:
+            if not os.path.isdir(path) and os.path.isdir(legacy_dir):
+                _migrate_legacy(path, legacy_dir)
+            _store = TrackerStore(path, "amount")
+        return _store
+
+
+def history_version(ticker):
+    """Changes whenever dividends are appended for the ticker"""
+    return open_dividend_store().version(ticker)
+
+
+def load_dividend_history(ticker):
+    """Return ``[{"date": "YYYY-MM-DD", "amount": float}]`` for a ticker, or None if it has none"""
+    ts, amounts = open_dividend_store().columns(ticker)
+    if not len(ts):
+        return None
+    return [
+        {'date': from_epoch(t).strftime('%Y-%m-%d'), 'amount': float(amount)}
+        for t, amount in zip(ts, amounts)
+    ]
+
+
+def _download_dividends(tickers, start=None):
+    """Dividend series for all tickers from one multi-ticker request"""
+    import pandas as pd
+    import yfinance as yf
+
+    period = {'start': start} if start else {'period': 'max'}
+    data = get_executor().call(
+        YAHOO, yf.download, tickers, actions=True, group_by="column",
+        auto_adjust=False, threads=True, progress=False, **period)
+    if data is None or data.empty or 'Dividends' not in data:
+        return {}
+    dividends = data['Dividends']
+    if isinstance(dividends, pd.Series):
+        dividends = dividends.to_frame(tickers[0])
+    return {
+        ticker: dividends[ticker][dividends[ticker] > 0]
+        for ticker in tickers if ticker in dividends
+    }
+
+
+def sync_dividends(tickers, log=print):
+    """Fetch new dividends for all tickers in one batch and append them; returns the count added"""
+    tickers = list(tickers)
+    if not tickers:
+        return 0
+    store = open_dividend_store()
+    last_ts = {ticker: (store.timestamps(ticker)[-1] if store.count(ticker) else None) for ticker in tickers}
+
+    # Tickers with no history need the full series; otherwise start at the
+    # oldest last-known ex-date so one request covers everyone.
+    start = None
+    if all(ts is not None for ts in last_ts.values()):
+        start = from_epoch(min(last_ts.values())).strftime('%Y-%m-%d')
+    try:
+        # Cached per ticker: a series fetched from an earlier start still covers
+        # everything after the ticker's last ex-date, which only moves forward.
+        downloaded = get_response_cache().get_many(
+            'dividends', tickers, lambda missing: _download_dividends(missing, start))
+    except Exception as e:
+        log(f"❌ Dividend sync failed: {e}")
+        return 0
+
+    added = 0
+    for ticker, series in downloaded.items():
+        points = [
+            (to_epoch(date.strftime('%Y-%m-%d')), float(amount))
+            for date, amount in series.items()
+        ]
+        points = [(ts, amount) for ts, amount in points if last_ts[ticker] is None or ts > last_ts[ticker]]
+        if points:
+            timestamps, amounts = zip(*points)
+            store.append_many(ticker, timestamps, amounts)
+            added += len(points)
+    log(f"💵 Dividend sync: {added} new dividends across {len(tickers)} tickers")
+    return added
+
+
+if __name__ == "__main__":
+    # Usage: python dividend_history.py [TICKER ...]   (defaults to portfolio.json)
+    tickers = sys.argv[1:]
+    if not tickers:
+        with open("portfolio.json", 'r') as f:
+            tickers = list(json.load(f).keys())
+    sync_dividends(tickers)
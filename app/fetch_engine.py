@@ -0,0 +1,142 @@
+"""Shared fetch executor for per-ticker upstream calls.
+
+All ticker fetches in the monitor and the dashboard go through one bounded
+thread pool. Each upstream (Yahoo, Polygon, Seeking Alpha) has its own token
+bucket, so scan time is governed by the configured request rate rather than
+ticker count x latency. Failed calls are retried with exponential backoff.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import get_config
+
+YAHOO = "yahoo"
+POLYGON = "polygon"
+SEEKING_ALPHA = "seeking_alpha"
+
+# Requests per second and burst size per upstream; overridden by
+# `fetch_settings.rate_limits` in config.yaml.
+DEFAULT_RATE_LIMITS = {
+    YAHOO: {"rate": 2.0, "burst": 4},
+    POLYGON: {"rate": 5.0, "burst": 10},
+    SEEKING_ALPHA: {"rate": 0.33, "burst": 1},
+}
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchExecutor:
+    """Bounded thread pool with per-upstream rate limiting and retry"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, rate_limits=None,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits.update(rate_limits or {})
+        self.buckets = {
+            name: TokenBucket(limit.get("rate", 1.0), limit.get("burst", 1))
+            for name, limit in limits.items()
+        }
+
+    def _bucket(self, upstream):
+        if upstream not in self.buckets:
+            self.buckets[upstream] = TokenBucket(**DEFAULT_RATE_LIMITS[YAHOO])
+        return self.buckets[upstream]
+
+    def call(self, upstream, fn, *args, **kwargs):
+        """Run fn in the calling thread, rate-limited and retried with backoff
+
+        An upstream of None runs fn unthrottled; use it to fan out work whose
+        own HTTP calls already go through call().
+        """
+        if upstream is None:
+            return fn(*args, **kwargs)
+        bucket = self._bucket(upstream)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(MAX_BACKOFF, self.backoff * 2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+    def submit(self, upstream, fn, *args, **kwargs):
+        """Schedule a rate-limited, retried call on the shared pool"""
+        return self.pool.submit(self.call, upstream, fn, *args, **kwargs)
+
+    def map(self, upstream, fn, items, on_error=None):
+        """Fetch fn(item) for every item concurrently; returns {item: result}
+
+        Items whose fetch still fails after retries are left out of the
+        result and reported through on_error(item, exc) when given.
+        """
+        futures = {self.submit(upstream, fn, item): item for item in items}
+        results = {}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(item, e)
+        return results
+
+
+_executor = None
+_settings = None  # None: use `fetch_settings` from config.yaml
+_lock = threading.Lock()
+
+
+def configure(settings):
+    """Override the `fetch_settings` the shared executor is built with"""
+    global _executor, _settings
+    with _lock:
+        _settings = settings or {}
+        if _executor is not None:
+            _executor.pool.shutdown(wait=False)
+        _executor = None
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            settings = _settings if _settings is not None else get_config().get('fetch_settings') or {}
+            _executor = FetchExecutor(
+                max_workers=settings.get("max_workers", DEFAULT_MAX_WORKERS),
+                rate_limits=settings.get("rate_limits"),
+                max_retries=settings.get("max_retries", DEFAULT_MAX_RETRIES),
+                backoff=settings.get("backoff_seconds", DEFAULT_BACKOFF),
+            )
+        return _executor
@@ -0,0 +1,130 @@
+"""Per-cycle market data snapshot shared by every check in a scan.
+
+One bulk ``yf.download`` call fetches 60 days of history for every ticker;
+``.info`` (NAV, yield, total assets) is read once per ticker per cycle,
+concurrently through the shared fetch executor. Both go through the shared
+response cache, so only tickers whose cached response has expired reach
+Yahoo. The checks in ``app.py`` then read from the same in-memory snapshot
+instead of calling ``yf.Ticker`` themselves.
+"""
+import datetime
+
+import pandas as pd
+import yfinance as yf
+
+from fetch_engine import YAHOO, get_executor
+from response_cache import get_response_cache
+
+HISTORY_PERIOD = "60d"
+
+
+class MarketSnapshot:
+    """Price, NAV, yield, volume and recent history for a set of tickers"""
+
+    def __init__(self, quotes, histories, taken_at=None):
+        self.quotes = quotes        # ticker -> {'price', 'nav', 'yield', 'volume', 'total_assets'}
+        self.histories = histories  # ticker -> DataFrame with Close/Volume columns
+        self.taken_at = taken_at or datetime.datetime.utcnow()
+
+    @classmethod
+    def fetch(cls, tickers, log=print):
+        tickers = sorted(set(tickers))
+        histories = _download_histories(tickers, log)
+        return cls.from_data(tickers, histories, fetch_infos(tickers, log))
+
+    @classmethod
+    def from_data(cls, tickers, histories, infos):
+        """Build a snapshot from already-fetched histories and ``.info`` dicts"""
+        quotes = {}
+        for ticker in tickers:
+            hist = histories.get(ticker)
+            info = infos.get(ticker) or {}
+            has_hist = hist is not None and not hist.empty and 'Close' in hist
+            quotes[ticker] = {
+                'price': float(hist['Close'].iloc[-1]) if has_hist else None,
+                'volume': float(hist['Volume'].iloc[-1]) if has_hist and 'Volume' in hist else None,
+                'nav': info.get('navPrice'),
+                'yield': info.get('yield') or info.get('dividendYield') or 0,
+                'total_assets': info.get('totalAssets'),
+            }
+        return cls(quotes, histories)
+
+    @classmethod
+    def merge(cls, snapshots):
+        """One snapshot covering several (e.g. the batches of a scan), dated by the earliest"""
+        quotes, histories = {}, {}
+        for snapshot in snapshots:
+            quotes.update(snapshot.quotes)
+            histories.update(snapshot.histories)
+        return cls(quotes, histories, min((s.taken_at for s in snapshots), default=None))
+
+    def __contains__(self, ticker):
+        return ticker in self.quotes
+
+    @property
+    def tickers(self):
+        return list(self.quotes)
+
+    def _field(self, ticker, field):
+        return self.quotes.get(ticker, {}).get(field)
+
+    def price(self, ticker):
+        return self._field(ticker, 'price')
+
+    def nav(self, ticker):
+        return self._field(ticker, 'nav')
+
+    def dividend_yield(self, ticker):
+        return self._field(ticker, 'yield')
+
+    def volume(self, ticker):
+        return self._field(ticker, 'volume')
+
+    def total_assets(self, ticker):
+        return self._field(ticker, 'total_assets')
+
+    def history(self, ticker):
+        hist = self.histories.get(ticker)
+        return hist if hist is not None else pd.DataFrame()
+
+
+def _ticker_info(ticker):
+    return yf.Ticker(ticker).info or None  # an empty reply is not cached
+
+
+def fetch_infos(tickers, log=print):
+    """``.info`` for every ticker, from the response cache where it is still fresh"""
+    cache = get_response_cache()
+    # Fan out unthrottled; only cache misses take a Yahoo token
+    return get_executor().map(
+        None, lambda t: cache.get('info', t, lambda: get_executor().call(YAHOO, _ticker_info, t)), tickers,
+        on_error=lambda t, e: log(f"⚠️ Snapshot: no info for {t}: {e}"))
+
+
+def _download_histories(tickers, log):
+    """Recent history for all tickers: cached ones from the response cache, the rest in one request"""
+    if not tickers:
+        return {}
+    try:
+        return get_response_cache().get_many('history', tickers, _download_history_batch)
+    except Exception as e:
+        log(f"❌ Snapshot history download failed: {e}")
+        return {}
+
+
+def _download_history_batch(tickers):
+    data = get_executor().call(
+        YAHOO, yf.download, tickers, period=HISTORY_PERIOD, group_by="ticker",
+        auto_adjust=True, threads=True, progress=False)
+
+    histories = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            hist = data[ticker]
+        else:
+            hist = data
+        hist = hist.dropna(subset=['Close']) if 'Close' in hist else hist.iloc[0:0]
+        histories[ticker] = hist
+    return histories
@@ -0,0 +1,255 @@
+"""Seeking Alpha news, article content and sentiment for the dashboard.
+
+Runs outside the Streamlit script so the process-wide background service can
+refresh the shared ``news_cache.json``; dashboard sessions only read it.
+
+``refresh_stale_news`` is a small pipeline: every stale ticker's feed is
+polled concurrently with a conditional GET (ETag / If-Modified-Since kept in
+the cache entry, so an unchanged feed costs a 304 and no parsing), article
+links shared by several tickers are fetched once with bounded concurrency,
+new articles are sentiment-scored in one batch, and the cache is published
+in a single write. All HTTP goes through one pooled ``requests.Session``;
+requests and feedparser are imported on first use.
+"""
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+import pytz
+
+from article_cache import get_article_cache
+from article_extract import extract_text
+from fetch_engine import get_executor, SEEKING_ALPHA
+import sentiment
+
+FEED_URL = "https://seekingalpha.com/api/sa/combined/{ticker}.xml"
+NEWS_CACHE_FILE = "news_cache.json"
+NEWS_UPDATE_INTERVAL = 3600  # 1 hour in seconds
+MAX_ARTICLE_REQUESTS = 10  # per hour, across all sessions
+MAX_ARTICLE_FETCHES = 4  # concurrent article downloads
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = 10
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
+
+news_cache_lock = threading.Lock()
+_article_requests = {'count': 0, 'last_time': 0}
+_article_requests_lock = threading.Lock()
+_article_slots = threading.BoundedSemaphore(MAX_ARTICLE_FETCHES)
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """The shared keep-alive session used for feed and article requests"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def http_get(url, headers=None):
+    """GET through the pooled session; raises on 4xx/5xx so the executor retries"""
+    response = http_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response
+
+
+def load_news_cache():
+    """Load the news cache from file"""
+    try:
+        if os.path.exists(NEWS_CACHE_FILE):
+            with open(NEWS_CACHE_FILE, 'r') as f:
+                cache = json.load(f)
+                # Convert timestamp strings to datetime objects
+                for ticker in cache:
+                    cache[ticker]['last_update'] = datetime.datetime.fromisoformat(cache[ticker]['last_update'])
+                return cache
+        return {}
+    except Exception as e:
+        print(f"⚠️ Error loading news cache: {e}")
+        return {}
+
+
+def save_news_cache(cache):
+    """Atomically publish the news cache so readers never see a partial file"""
+    try:
+        # Convert datetime objects to ISO format strings
+        cache_copy = {}
+        for ticker in cache:
+            cache_copy[ticker] = cache[ticker].copy()
+            cache_copy[ticker]['last_update'] = cache[ticker]['last_update'].isoformat()
+
+        tmp_path = f"{NEWS_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache_copy, f)
+        os.replace(tmp_path, NEWS_CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ Error saving news cache: {e}")
+
+
+def load_cached_article(url):
+    """Return (content, sentiment) from the article cache, or None if missing or expired"""
+    return get_article_cache().get(url)
+
+
+def save_cached_article(url, content, score):
+    get_article_cache().put(url, content, score)
+
+
+def _take_article_request():
+    """Count an article request against the hourly budget; False once it is spent"""
+    with _article_requests_lock:
+        now = time.time()
+        if _article_requests['count'] >= MAX_ARTICLE_REQUESTS:
+            if now - _article_requests['last_time'] < 3600:
+                return False
+            _article_requests['count'] = 0
+        _article_requests['count'] += 1
+        _article_requests['last_time'] = now
+        return True
+
+
+def fetch_article_content(url):
+    """Fetch and extract article content with rate limiting"""
+    try:
+        if not _take_article_request():
+            return ''
+
+        response = get_executor().call(SEEKING_ALPHA, http_get, url)
+        return extract_text(response.text, url)
+
+    except Exception as e:
+        print(f"⚠️ Error fetching article content: {e}")
+        return ''
+
+
+def poll_feed(ticker, previous=None):
+    """Conditionally fetch a ticker's feed; returns None when it is unchanged (304)"""
+    headers = {}
+    if previous and previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous and previous.get('modified'):
+        headers['If-Modified-Since'] = previous['modified']
+    response = get_executor().call(SEEKING_ALPHA, http_get, FEED_URL.format(ticker=ticker), headers)
+    if response.status_code == 304:
+        return None
+    import feedparser
+    return {
+        'feed': feedparser.parse(response.content),
+        'etag': response.headers.get('ETag'),
+        'modified': response.headers.get('Last-Modified'),
+    }
+
+
+def latest_entry(ticker, poll, now):
+    """Cache entry for a freshly polled feed, before its article is attached"""
+    if poll['feed'].entries:
+        latest = poll['feed'].entries[0]
+
+        # Clean up the title
+        title = re.sub(r'<[^>]+>', '', latest.title)
+        title = ' '.join(title.split())
+
+        # Get the publication date
+        pub_date = datetime.datetime(*latest.published_parsed[:6])
+        pacific_date = pub_date.astimezone(PACIFIC_TZ)
+
+        entry = {
+            'title': title,
+            'link': latest.link,
+            'date': pacific_date.strftime('%Y-%m-%d'),
+        }
+    else:
+        entry = {
+            'title': f"No recent news available for {ticker}",
+            'link': f"https://seekingalpha.com/symbol/{ticker}",
+            'date': now.strftime('%Y-%m-%d'),
+        }
+    entry.update({
+        'sentiment': 0,
+        'content_summary': '',
+        'last_update': now,
+        'etag': poll['etag'],
+        'modified': poll['modified'],
+    })
+    return entry
+
+
+def _fetch_article(url):
+    """(content, sentiment) from the article cache, or (content, None) if newly downloaded"""
+    cached = load_cached_article(url)
+    if cached:
+        return cached
+    with _article_slots:
+        return fetch_article_content(url), None
+
+
+def stale_tickers(tickers, cache):
+    """Tickers whose news cache entry is missing or older than NEWS_UPDATE_INTERVAL"""
+    current_time = datetime.datetime.now(PACIFIC_TZ)
+    return [
+        ticker for ticker in tickers
+        if ticker not in cache or
+        (current_time - cache[ticker]['last_update']).total_seconds() >= NEWS_UPDATE_INTERVAL
+    ]
+
+
+def refresh_stale_news(tickers, cache):
+    """Refresh tickers whose cache entry is missing or stale and publish the cache once"""
+    stale = stale_tickers(tickers, cache)
+    if not stale:
+        return
+    executor = get_executor()
+    now = datetime.datetime.now(PACIFIC_TZ)
+    log_error = lambda ticker, e: print(f"⚠️ Error updating news for {ticker}: {e}")
+
+    # Stage 1: conditional feed polls, throttled by the Seeking Alpha rate limit
+    polls = executor.map(None, lambda ticker: poll_feed(ticker, cache.get(ticker)), stale, on_error=log_error)
+
+    # Stage 2: unchanged feeds only get a new timestamp; changed ones a new entry
+    updates = {}
+    for ticker, poll in polls.items():
+        if poll is None:
+            updates[ticker] = dict(cache[ticker], last_update=now)
+        else:
+            updates[ticker] = latest_entry(ticker, poll, now)
+
+    # Stage 3: each new article once, however many tickers link to it
+    links = {
+        entry['link'] for ticker, entry in updates.items()
+        if polls[ticker] is not None and polls[ticker]['feed'].entries
+    }
+    articles = executor.map(None, _fetch_article, links)
+
+    # Stage 4: score the new articles in one batch and cache them
+    fresh = [link for link, (content, score) in articles.items() if content and score is None]
+    scores = sentiment.score_texts([articles[link][0] for link in fresh])
+    for link, score in zip(fresh, scores):
+        articles[link] = (articles[link][0], score)
+        save_cached_article(link, articles[link][0], score)
+
+    for ticker, entry in updates.items():
+        if entry['link'] in articles and polls[ticker] is not None:
+            content, sentiment_score = articles[entry['link']]
+            entry['sentiment'] = sentiment_score or 0
+            entry['content_summary'] = content[:500] + '...' if len(content) > 500 else content
+
+    # Stage 5: publish
+    with news_cache_lock:
+        cache.update(updates)
+        save_news_cache(cache)
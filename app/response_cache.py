@@ -0,0 +1,156 @@
+"""On-disk cache for upstream (Yahoo) responses, shared by every process.
+
+Responses are pickled into one SQLite file (WAL mode, like the article
+cache) keyed by ``(kind, key)`` and expire after the TTL of their kind:
+``.info`` fields such as navPrice, yield and totalAssets change at most
+daily, recent price history within minutes, dividends daily. Callers in one
+process asking for a key that is already being fetched wait for that request
+instead of issuing their own, and batch lookups fetch only the keys that are
+missing or stale. The monitor and the dashboard open the same file, so a
+response fetched by one is served to the other.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from config import get_config
+
+RESPONSE_CACHE_DB = "response_cache.db"
+DEFAULT_TTLS = {
+    'info': 6 * 3600,
+    'history': 10 * 60,
+    'dividends': 12 * 3600,
+}
+PURGE_AFTER = 7 * 86400  # entries not refetched for this long are deleted
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+
+class ResponseCache:
+    def __init__(self, path=RESPONSE_CACHE_DB, ttls=None):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.lock = threading.Lock()
+        self.inflight = {}  # (kind, key) -> Future of the request fetching it
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def _read(self, kind, keys, max_age):
+        """{key: value} for the keys stored within max_age seconds (None: any age)"""
+        if not keys:
+            return {}
+        oldest = time.time() - max_age if max_age is not None else 0
+        placeholders = ",".join("?" * len(keys))
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT key, value FROM responses WHERE kind = ? AND fetched_at > ? AND key IN ({placeholders})",
+                (kind, oldest, *keys),
+            ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def _write(self, kind, values):
+        now = time.time()
+        rows = [(kind, key, pickle.dumps(value), now) for key, value in values.items() if value is not None]
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", rows)
+            # Stale entries stay for peek(); only ones nobody has refetched in a week go
+            purge_before = now - max(PURGE_AFTER, self.ttls[kind])
+            self.db.execute("DELETE FROM responses WHERE kind = ? AND fetched_at <= ?", (kind, purge_before))
+
+    def peek(self, kind, keys):
+        """Whatever is stored for the keys, stale or not, without fetching anything
+
+        Entries outlive their TTL until they are refetched, or for PURGE_AFTER
+        seconds, so this returns the last response for every key fetched in
+        the past week.
+        """
+        return self._read(kind, list(keys), None)
+
+    def get(self, kind, key, fetch):
+        """The cached value for key, or fetch() it; concurrent callers share one fetch"""
+        return self.get_many(kind, [key], lambda keys: {key: fetch()}).get(key)
+
+    def get_many(self, kind, keys, fetch_many):
+        """{key: value} for the keys; fetch_many(missing_keys) -> {key: value} is called once for the rest
+
+        Keys the upstream returned nothing for are left out and not cached.
+        An exception from fetch_many reaches this caller and every caller
+        waiting on the same keys.
+        """
+        keys = list(keys)
+        values = self._read(kind, keys, self.ttls[kind])
+        missing = [key for key in keys if key not in values]
+        with self.lock:
+            self.hits += len(values)
+            self.misses += len(missing)
+            waiting = {key: self.inflight[(kind, key)] for key in missing if (kind, key) in self.inflight}
+            owned = {key: Future() for key in missing if key not in waiting}
+            for key, future in owned.items():
+                self.inflight[(kind, key)] = future
+            self.coalesced += len(waiting)
+
+        if owned:
+            try:
+                fetched = fetch_many(list(owned)) or {}
+                self._write(kind, fetched)
+                for key, future in owned.items():
+                    future.set_result(fetched.get(key))
+            except BaseException as e:
+                for future in owned.values():
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+            finally:
+                with self.lock:
+                    for key in owned:
+                        self.inflight.pop((kind, key), None)
+            values.update((key, fetched[key]) for key in owned if fetched.get(key) is not None)
+        for key, future in waiting.items():
+            value = future.result()
+            if value is not None:
+                values[key] = value
+        return values
+
+    def stats(self):
+        """Stored entries per kind and this process's hit/miss/coalesced counters"""
+        with self.lock:
+            entries = dict(self.db.execute("SELECT kind, COUNT(*) FROM responses GROUP BY kind").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_settings():
+    return get_config().get('response_cache') or {}
+
+
+def get_response_cache():
+    """The process-wide response cache, with TTLs from `response_cache.ttl_seconds`"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(ttls=cache_settings().get('ttl_seconds'))
+        return _cache
@@ -0,0 +1,125 @@
+"""Vectorized risk metrics over the NAV and price tracker history.
+
+Each ticker's recent history is loaded into one right-aligned 2-D float64
+matrix (tickers x points, NaN-padded on the left); premium/discount, rolling
+NAV volatility, momentum, NAV drops and N-day decay are then computed for
+every ticker at once with NumPy instead of per-ticker Python loops. Rolling
+statistics use cumulative sums, so their cost does not depend on the window.
+"""
+import time
+
+import numpy as np
+
+
+def load_matrix(store, tickers, length):
+    """Return a (len(tickers), length) matrix of each ticker's last `length` values"""
+    matrix = np.full((len(tickers), length), np.nan)
+    for i, ticker in enumerate(tickers):
+        values = store.values(ticker)[-length:]
+        if len(values):
+            matrix[i, length - len(values):] = values
+    return matrix
+
+
+def latest(matrix):
+    return matrix[:, -1] if matrix.shape[1] else np.full(matrix.shape[0], np.nan)
+
+
+def _window_sum(a, window):
+    c = np.cumsum(a, axis=1)
+    c = np.concatenate([np.zeros((a.shape[0], 1)), c], axis=1)
+    return c[:, window:] - c[:, :-window]
+
+
+def rolling_mean_std(matrix, window):
+    """Rolling mean and population std for every ticker and every window end
+
+    Returns two (tickers, points - window + 1) arrays; windows that reach
+    into the NaN padding are NaN.
+    """
+    valid = ~np.isnan(matrix)
+    # Shift each row by its latest value so flat NAV runs don't lose
+    # precision in the sum-of-squares difference.
+    ref = np.nan_to_num(matrix[:, -1:])
+    x = np.where(valid, matrix - ref, 0.0)
+    n = _window_sum(valid.astype(float), window)
+    s = _window_sum(x, window)
+    ss = _window_sum(x * x, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s / n
+        std = np.sqrt(np.maximum(ss / n - mean * mean, 0.0))
+        mean = mean + ref
+    full = n == window
+    return np.where(full, mean, np.nan), np.where(full, std, np.nan)
+
+
+def volatility_pct(matrix, window):
+    """Coefficient of variation (std / mean, in %) over the last `window` points"""
+    mean, std = rolling_mean_std(matrix[:, -window:], window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (std / mean * 100)[:, -1]
+
+
+def momentum_pct(matrix, window):
+    """Percent change from `window - 1` points ago to the latest point"""
+    if matrix.shape[1] < window:
+        return np.full(matrix.shape[0], np.nan)
+    start = matrix[:, -window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (matrix[:, -1] - start) / start * 100
+
+
+def drop_counts(matrix, window):
+    """Number of point-to-point declines within the last `window` points"""
+    return (np.diff(matrix[:, -window:], axis=1) < 0).sum(axis=1)
+
+
+def drop_streak(matrix):
+    """Length of the trailing run of consecutive declines"""
+    drops = np.diff(matrix, axis=1) < 0
+    return np.cumprod(drops[:, ::-1], axis=1).sum(axis=1)
+
+
+def values_at(store, tickers, epoch, tolerance=None):
+    """Each ticker's value at `epoch` (NaN if none within `tolerance` seconds), see TrackerStore.value_at"""
+    out = np.full(len(tickers), np.nan)
+    for i, ticker in enumerate(tickers):
+        value = store.value_at(ticker, epoch, tolerance)
+        if value is not None:
+            out[i] = value
+    return out
+
+
+def compute_risk_metrics(nav_store, price_store, tickers, window=5, decay_days=30, decay_tolerance_days=2,
+                         now=None):
+    """Compute every risk metric for all tickers in one pass
+
+    Returns a dict of arrays aligned with `tickers`:
+    nav, price, premium_pct, nav_volatility, price_momentum, nav_drops,
+    nav_drop_ratio, nav_drop_streak and nav_decay_pct (percent NAV change
+    over `decay_days`, negative for a decline; NaN when the tracker has no
+    point within `decay_tolerance_days` of that date).
+    """
+    tickers = list(tickers)
+    now = now or time.time()
+    nav = load_matrix(nav_store, tickers, window)
+    price = load_matrix(price_store, tickers, window)
+    nav_now, price_now = latest(nav), latest(price)
+    nav_then = values_at(nav_store, tickers, now - decay_days * 86400, decay_tolerance_days * 86400)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        premium_pct = (price_now - nav_now) / nav_now * 100
+        nav_decay_pct = (nav_now - nav_then) / nav_then * 100
+    drops = drop_counts(nav, window)
+    return {
+        'nav': nav_now,
+        'price': price_now,
+        'premium_pct': premium_pct,
+        'nav_volatility': volatility_pct(nav, window),
+        'price_momentum': momentum_pct(price, window),
+        'nav_drops': drops,
+        'nav_drop_ratio': drops / max(window - 1, 1),
+        'nav_drop_streak': drop_streak(nav),
+        'nav_decay_pct': nav_decay_pct,
+    }
+
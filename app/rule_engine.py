@@ -0,0 +1,284 @@
+"""Declarative threshold rules compiled into vectorized predicates.
+
+Rules live under ``rules:`` in config.yaml, one list per rule set. Each rule
+set runs over one per-cycle metrics table (a dict of equal-length NumPy
+columns plus the ``ticker`` list, one row per ticker):
+
+- ``risk``     - the hourly scan (app_monitoring.build_metrics)
+- ``aum``      - the daily AUM check
+- ``trim``     - held positions in the smart-trim pass
+- ``rotation`` - rotation candidates; a row that matches any rule is excluded
+
+A rule's ``when`` is an expression over the set's columns, e.g.
+``abs(premium_pct) >= 2 and volume < volume_avg``. It may use numbers,
+column names, ``+ - * /``, (chained) comparisons, ``and``/``or``/``not`` and
+``abs()``, ``min()``, ``max()`` and ``missing()``. The expression is parsed
+with ``ast``, checked against that whitelist and turned into a tree of NumPy
+closures; nothing is ``eval``'d.
+
+A comparison with a missing (NaN) value is unknown, and ``not``/``and``/``or``
+keep it unknown unless the other side decides the result (as SQL treats
+NULL). A rule only fires where its condition is known to be true, so neither
+``premium_pct != 2`` nor ``not premium_pct > 2`` matches a row without a
+premium; use ``missing(premium_pct)`` to match those rows.
+
+Every rule of a set is evaluated in one pass per cycle. Identical
+subexpressions are compiled to one node and computed once per pass, so rules
+that share terms cost little more than the terms themselves. Rules sharing a
+``group`` are exclusive: a row is reported only for the first listed rule of
+the group that matches (threshold tiers). Other keys (``severity``,
+``trim_pct``, ``action``, ...) are carried on the rule as ``params``. Each
+rule counts its hits and evaluation time for the life of the config version.
+
+Sets missing from ``rules:`` are generated from the older
+``risk_thresholds`` / ``principal_loss_thresholds`` sections and the
+built-in trim tiers and rotation filters, so existing configs keep working.
+"""
+import ast
+import functools
+import time
+
+import numpy as np
+
+SEVERITIES = ('critical', 'warning', 'info')
+
+RULE_SET_COLUMNS = {
+    'risk': ('price', 'nav', 'premium_pct', 'nav_decay_pct', 'volume', 'volume_avg', 'volume_drop_pct',
+             'buy_nav', 'loss_pct'),
+    'aum': ('aum', 'previous_aum', 'aum_drop_pct', 'min_aum', 'max_aum'),
+    'trim': ('price', 'buy_nav', 'gain_pct', 'shares'),
+    'rotation': ('nav', 'price', 'discount_pct', 'yield_pct', 'nav_change_pct', 'total_assets'),
+}
+
+BINARY_OPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+COMPARE_OPS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+FUNCTIONS = {'abs': (np.abs, 1), 'min': (np.minimum, 2), 'max': (np.maximum, 2), 'missing': (np.isnan, 1)}
+
+
+# Truth values are 1.0 (true), 0.0 (false) or NaN (unknown)
+def _truth(value):
+    value = np.asarray(value, dtype=float)
+    return np.where(np.isnan(value), np.nan, value != 0)
+
+
+def _and(a, b):
+    return np.where((a == 0) | (b == 0), 0.0, np.minimum(a, b))
+
+
+def _or(a, b):
+    return np.where((a == 1) | (b == 1), 1.0, np.maximum(a, b))
+
+
+def _compare(op, a, b):
+    return np.where(np.isnan(a) | np.isnan(b), np.nan, op(a, b))
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _memoized(key, func):
+    """Wrap a node so it is computed at most once per evaluation pass"""
+    def evaluate(table, memo):
+        if key not in memo:
+            memo[key] = func(table, memo)
+        return memo[key]
+    return evaluate
+
+
+class _Compiler:
+    """Compiles `when` expressions for one rule set, sharing identical subexpressions"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.nodes = {}  # ast.dump(node) -> compiled node
+
+    def compile(self, source):
+        try:
+            tree = ast.parse(str(source), mode='eval')
+        except SyntaxError as e:
+            raise RuleError(f"{source!r}: {e.msg}")
+        return self._node(tree.body, source)
+
+    def _node(self, node, source):
+        key = ast.dump(node)
+        if key not in self.nodes:
+            self.nodes[key] = self._build(node, source, key)
+        return self.nodes[key]
+
+    def _build(self, node, source, key):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+            value = node.value
+            return lambda table, memo: value
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in self.columns:
+                raise RuleError(f"{source!r}: unknown column '{name}' (expected one of {', '.join(self.columns)})")
+            return lambda table, memo: table[name]
+
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+            op = BINARY_OPS[type(node.op)]
+            left, right = self._node(node.left, source), self._node(node.right, source)
+            return _memoized(key, lambda table, memo: op(left(table, memo), right(table, memo)))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self._node(node.operand, source)
+            return _memoized(key, lambda table, memo: 1.0 - _truth(operand(table, memo)))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            op = np.negative if isinstance(node.op, ast.USub) else np.positive
+            operand = self._node(node.operand, source)
+            return _memoized(key, lambda table, memo: op(operand(table, memo)))
+        if isinstance(node, ast.BoolOp):
+            op = _and if isinstance(node.op, ast.And) else _or
+            values = [self._node(value, source) for value in node.values]
+            return _memoized(key, lambda table, memo: functools.reduce(
+                op, [_truth(value(table, memo)) for value in values]))
+        if isinstance(node, ast.Compare) and all(type(op) in COMPARE_OPS for op in node.ops):
+            # a < b <= c  ->  (a < b) and (b <= c)
+            operands = [self._node(operand, source) for operand in [node.left] + node.comparators]
+            ops = [COMPARE_OPS[type(op)] for op in node.ops]
+
+            def compare(table, memo):
+                values = [operand(table, memo) for operand in operands]
+                return functools.reduce(_and, [_compare(op, a, b) for op, a, b in zip(ops, values, values[1:])])
+            return _memoized(key, compare)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            if node.func.id not in FUNCTIONS:
+                raise RuleError(f"{source!r}: unknown function '{node.func.id}'")
+            func, arity = FUNCTIONS[node.func.id]
+            if len(node.args) != arity:
+                raise RuleError(f"{source!r}: {node.func.id}() takes {arity} argument(s)")
+            args = [self._node(arg, source) for arg in node.args]
+            return _memoized(key, lambda table, memo: func(*(arg(table, memo) for arg in args)))
+        raise RuleError(f"{source!r}: {type(node).__name__} is not allowed in a rule")
+
+
+class Rule:
+    def __init__(self, name, predicate, source, severity='warning', group=None, params=None):
+        self.name = name
+        self.predicate = predicate
+        self.source = source
+        self.severity = severity
+        self.group = group
+        self.params = params or {}
+        self.hits = 0
+        self.evaluations = 0
+        self.seconds = 0.0
+
+
+class RuleSet:
+    def __init__(self, name, rules):
+        self.name = name
+        self.rules = rules
+
+    def evaluate(self, table):
+        """Run every rule over the table in one pass; returns [(rule, row indices)] for rules that fired"""
+        rows = len(table['ticker'])
+        memo = {}
+        claimed = {}  # group -> rows already reported by an earlier rule of the group
+        fired = []
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for rule in self.rules:
+                started = time.perf_counter()
+                mask = np.broadcast_to(_truth(rule.predicate(table, memo)) == 1, (rows,))
+                if rule.group is not None:
+                    taken = claimed.get(rule.group, np.zeros(rows, dtype=bool))
+                    mask = mask & ~taken
+                    claimed[rule.group] = taken | mask
+                hit_rows = np.flatnonzero(mask)
+                rule.seconds += time.perf_counter() - started
+                rule.evaluations += 1
+                rule.hits += len(hit_rows)
+                if len(hit_rows):
+                    fired.append((rule, hit_rows))
+        return fired
+
+    def stats(self):
+        """Per-rule hit counts and mean evaluation time since this config version was loaded"""
+        return {
+            rule.name: {
+                'hits': rule.hits,
+                'evaluations': rule.evaluations,
+                'mean_ms': rule.seconds / rule.evaluations * 1000 if rule.evaluations else None,
+            }
+            for rule in self.rules
+        }
+
+    def summary(self):
+        return ", ".join(
+            f"{name} {s['hits']} hits/{s['mean_ms']:.2f}ms" for name, s in self.stats().items() if s['evaluations'])
+
+
+def compile_rule_set(name, specs):
+    if name not in RULE_SET_COLUMNS:
+        raise RuleError(f"unknown rule set '{name}' (expected one of {', '.join(RULE_SET_COLUMNS)})")
+    if not isinstance(specs, list):
+        raise RuleError(f"rules.{name} must be a list")
+    compiler = _Compiler(RULE_SET_COLUMNS[name])
+    rules = []
+    for spec in specs:
+        if not isinstance(spec, dict) or 'name' not in spec or 'when' not in spec:
+            raise RuleError(f"every rule in rules.{name} needs a name and a when")
+        params = {k: v for k, v in spec.items() if k not in ('name', 'when', 'severity', 'group')}
+        severity = spec.get('severity', 'warning')
+        if severity not in SEVERITIES:
+            raise RuleError(f"rule {spec['name']}: unknown severity '{severity}'")
+        try:
+            predicate = compiler.compile(spec['when'])
+        except RuleError as e:
+            raise RuleError(f"rule {spec['name']}: {e}")
+        rules.append(Rule(spec['name'], predicate, str(spec['when']), severity, spec.get('group'), params))
+    return RuleSet(name, rules)
+
+
+def _pct(value):
+    return f"{value * 100:g}"
+
+
+def default_rules(config):
+    """Rule specs equivalent to the threshold sections and the built-in tiers"""
+    risk = config.get('risk_thresholds', {})
+    principal = config.get('principal_loss_thresholds', {})
+    return {
+        'risk': [
+            {'name': 'premium_discount', 'severity': 'warning',
+             'when': f"abs(premium_pct) >= {_pct(risk.get('premium_discount_pct', 0.02))}"},
+            {'name': 'nav_decay', 'severity': 'critical',
+             'when': f"nav_decay_pct <= -{_pct(risk.get('nav_decay_pct', 0.05))}"},
+            {'name': 'volume_drop', 'severity': 'warning',
+             'when': f"volume_drop_pct >= {_pct(risk.get('volume_drop_pct', 0.30))}"},
+        ] + [
+            # Deepest tier first: each position reports only the worst tier it is in
+            {'name': f'principal_{tier}', 'group': 'principal',
+             'severity': 'warning' if tier == 'warning' else 'critical',
+             'when': f"loss_pct >= {_pct(level)}"}
+            for tier, level in sorted(principal.items(), key=lambda item: item[1], reverse=True)
+        ],
+        'aum': [
+            {'name': 'aum_low', 'group': 'aum_level', 'severity': 'critical', 'when': "aum < min_aum"},
+            {'name': 'aum_watch', 'group': 'aum_level', 'severity': 'warning', 'when': "aum < max_aum"},
+            {'name': 'aum_drop', 'severity': 'critical',
+             'when': f"aum_drop_pct >= {_pct(risk.get('aum_drop_pct', 0.20))}"},
+        ],
+        'trim': [
+            {'name': 'trim_25', 'group': 'trim', 'severity': 'info', 'when': "gain_pct >= 25", 'trim_pct': 0.20},
+            {'name': 'trim_18', 'group': 'trim', 'severity': 'info', 'when': "gain_pct >= 18", 'trim_pct': 0.15},
+            {'name': 'trim_15', 'group': 'trim', 'severity': 'info', 'when': "gain_pct >= 15", 'trim_pct': 0.10},
+        ],
+        'rotation': [
+            {'name': 'small_fund', 'when': "total_assets < 50000000"},
+            {'name': 'decaying_nav', 'when': "nav_change_pct < -10"},
+            {'name': 'weak_payer', 'when': "yield_pct < 5"},
+        ],
+    }
+
+
+def compile_rule_sets(config):
+    """Compile every rule set for a config: `rules:` entries override the defaults per set"""
+    configured = config.get('rules') or {}
+    if not isinstance(configured, dict):
+        raise RuleError("'rules' must map rule set names to lists of rules")
+    specs = {**default_rules(config), **configured}
+    return {name: compile_rule_set(name, rule_specs) for name, rule_specs in specs.items()}
@@ -0,0 +1,136 @@
+"""Asyncio scheduler for the monitor's scan, trim and AUM jobs.
+
+Every job runs as its own asyncio task with its own cadence and timeout, on
+its own worker thread, so a stuck NAV fetch in one job cannot starve the
+others. A job that is still running when it comes due again is skipped
+rather than stacked. Jobs can be limited to a time window (US market hours by
+default) and sleep until the window opens instead of polling the clock.
+"""
+import asyncio
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+
+
+def market_is_open(now=None):
+    """True during regular NYSE hours (Mon-Fri 9:30-16:00 ET; holidays not excluded)"""
+    now = (now or datetime.datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def seconds_until_market_open(now=None):
+    now = (now or datetime.datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if market_is_open(now):
+        return 0
+    day = now.date()
+    if now.time() >= MARKET_OPEN:
+        day += datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day += datetime.timedelta(days=1)
+    opens = datetime.datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ)
+    return (opens - now).total_seconds()
+
+
+class Job:
+    """A periodic job plus its latency metrics"""
+
+    def __init__(self, name, func, interval, timeout, market_hours_only=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.market_hours_only = market_hours_only
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"job-{name}")
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def record(self, latency, failed):
+        self.running = False
+        self.runs += 1
+        self.failures += int(failed)
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def metrics(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'skipped': self.skipped,
+            'last_latency': self.last_latency,
+            'avg_latency': self.total_latency / self.runs if self.runs else None,
+            'max_latency': self.max_latency,
+        }
+
+
+class MonitorScheduler:
+    def __init__(self, log=print):
+        self.log = log
+        self.jobs = {}
+
+    def add_job(self, name, func, interval, timeout, market_hours_only=False):
+        """Register func to run every `interval` seconds, abandoned after `timeout`"""
+        self.jobs[name] = Job(name, func, interval, timeout, market_hours_only)
+        return self.jobs[name]
+
+    def metrics(self):
+        return {name: job.metrics() for name, job in self.jobs.items()}
+
+    async def _execute(self, job):
+        loop = asyncio.get_running_loop()
+        job.running = True
+        started = time.monotonic()
+        future = loop.run_in_executor(job.worker, job.func)
+
+        def finished(f):
+            latency = time.monotonic() - started
+            error = None if f.cancelled() else f.exception()
+            job.record(latency, error is not None)
+            if error is not None:
+                self.log(f"❌ Job {job.name} failed after {latency:.1f}s: {error}")
+            else:
+                m = job.metrics()
+                self.log(f"⏱️ Job {job.name} finished in {latency:.1f}s "
+                         f"(avg {m['avg_latency']:.1f}s, max {m['max_latency']:.1f}s, runs {m['runs']})")
+
+        future.add_done_callback(finished)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), job.timeout)
+        except asyncio.TimeoutError:
+            # The worker thread cannot be killed; the job stays marked as
+            # running so later ticks are skipped until it finally returns.
+            job.timeouts += 1
+            self.log(f"⏰ Job {job.name} exceeded its {job.timeout:.0f}s timeout; other jobs continue")
+
+    async def _run_forever(self, job):
+        while True:
+            if job.market_hours_only:
+                wait = seconds_until_market_open()
+                if wait > 0:
+                    self.log(f"💤 Job {job.name} sleeping {wait / 3600:.1f}h until market open")
+                    await asyncio.sleep(wait)
+            started = time.monotonic()
+            if job.running:
+                job.skipped += 1
+                self.log(f"⏭️ Job {job.name} skipped: previous run still in progress")
+            else:
+                await self._execute(job)
+            await asyncio.sleep(max(0, job.interval - (time.monotonic() - started)))
+
+    async def _main(self):
+        await asyncio.gather(*(self._run_forever(job) for job in self.jobs.values()))
+
+    def run(self):
+        asyncio.run(self._main())
@@ -0,0 +1,98 @@
+"""Sentiment scoring shared by article bodies and headlines.
+
+Scores are polarity averages over 1,000-character chunks (a headline is a
+single chunk), memoized by content hash, so the same syndicated article under
+several tickers or URLs is scored once. Misses are scored in batches on a
+small process pool so TextBlob's pure-Python analysis does not hold the GIL
+in the Streamlit server process; tiny batches are scored inline because the
+round trip would cost more than the work.
+"""
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+CHUNK_SIZE = 1000
+MEMO_SIZE = 4096
+POOL_WORKERS = 2
+INLINE_CHARS = 4000  # batches smaller than this skip the process pool
+
+_memo = OrderedDict()  # content hash -> score
+_memo_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+_analyzer = None
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _score(text):
+    """Average polarity over CHUNK_SIZE chunks, reusing one analyzer per process"""
+    global _analyzer
+    if not text:
+        return 0
+    if _analyzer is None:
+        from textblob.sentiments import PatternAnalyzer
+        _analyzer = PatternAnalyzer()
+    chunks = [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+    return sum(_analyzer.analyze(chunk).polarity for chunk in chunks) / len(chunks)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a server process full of threads and locks is unsafe
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def score_texts(texts):
+    """Return a polarity score for each text, scoring only unseen content"""
+    keys = [content_hash(text) for text in texts]
+    with _memo_lock:
+        scores = {key: _memo[key] for key in keys if key in _memo}
+        for key in scores:
+            _memo.move_to_end(key)
+
+    misses = {}
+    for key, text in zip(keys, texts):
+        if key not in scores:
+            misses.setdefault(key, text)
+    if misses:
+        todo = list(misses.items())
+        texts_todo = [text for _, text in todo]
+        if sum(len(text) for text in texts_todo) < INLINE_CHARS:
+            results = [_score(text) for text in texts_todo]
+        else:
+            try:
+                results = list(_get_pool().map(_score, texts_todo, chunksize=4))
+            except (BrokenProcessPool, OSError) as e:
+                print(f"⚠️ Sentiment pool unavailable, scoring inline: {e}")
+                _reset_pool()
+                results = [_score(text) for text in texts_todo]
+        with _memo_lock:
+            for (key, _), score in zip(todo, results):
+                scores[key] = score
+                _memo[key] = score
+            while len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+
+    return [scores[key] for key in keys]
+
+
+def score_text(text):
+    return score_texts([text])[0]
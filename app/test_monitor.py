@@ -1,4 +1,4 @@
-from alert_emailer import send_email_alert
+from alert_emailer import send_email_alert, flush_alerts
 
 # Test Subject and Message
 subject = "✅ TEST: ETF Monitor Alert System Working"
@@ -13,3 +13,6 @@ If you received this email and/or SMS, your ETF Monitor notification system is c
 # Send the alert
 send_email_alert(subject=subject, body=body)
 
+# Wait for the background sender to deliver it
+flush_alerts(timeout=60)
+
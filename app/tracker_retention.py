@@ -0,0 +1,105 @@
+"""Retention tiers for the NAV/price tracker history.
+
+Recent history (``raw_days``) is left exactly as recorded: the risk metrics
+read the last N points, so thinning repeated values there would change them.
+Older points are rolled into daily OHLC bars, and daily bars older than
+``daily_days`` into weekly bars. A run of identical values (a NAV that does
+not change for dozens of scans) becomes one bar whose ``count`` keeps the
+number of points it stood for, so storage and load time stay bounded while
+``TrackerStore.value_at`` can still answer the 30- and 60-day lookbacks.
+"""
+import sys
+import time
+
+import numpy as np
+
+from tracker_store import BAR_FIELDS, open_tracker
+
+DAY = 86400
+WEEK = 7 * DAY
+WEEK_ORIGIN = 4 * DAY  # 1970-01-05 was a Monday
+
+DEFAULT_RAW_DAYS = 14
+DEFAULT_DAILY_DAYS = 365
+
+
+def to_bars(ts, val, period, origin=0):
+    """Aggregate raw points into OHLC bars of `period` seconds"""
+    if not len(ts):
+        return np.empty((0, len(BAR_FIELDS)))
+    bucket = np.floor((ts - origin) / period)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)]
+    return np.column_stack([
+        bucket[starts] * period + origin,
+        val[starts],
+        np.maximum.reduceat(val, starts),
+        np.minimum.reduceat(val, starts),
+        val[ends - 1],
+        ends - starts,
+    ])
+
+
+def merge_bars(bars, period, origin=0):
+    """Re-aggregate bars into (possibly coarser) bars of `period` seconds"""
+    if not len(bars):
+        return bars
+    bars = bars[np.argsort(bars[:, 0], kind="stable")]
+    bucket = np.floor((bars[:, 0] - origin) / period)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bars)]
+    return np.column_stack([
+        bucket[starts] * period + origin,
+        bars[starts, 1],
+        np.maximum.reduceat(bars[:, 2], starts),
+        np.minimum.reduceat(bars[:, 3], starts),
+        bars[ends - 1, 4],
+        np.add.reduceat(bars[:, 5], starts),
+    ])
+
+
+def compact_ticker(store, ticker, now=None, raw_days=DEFAULT_RAW_DAYS, daily_days=DEFAULT_DAILY_DAYS):
+    """Apply the retention tiers to one ticker; returns (points before, points after)"""
+    now = now or time.time()
+    raw_cutoff = np.floor((now - raw_days * DAY) / DAY) * DAY
+    daily_cutoff = np.floor((now - daily_days * DAY - WEEK_ORIGIN) / WEEK) * WEEK + WEEK_ORIGIN
+
+    with store.lock:
+        ts, val = (np.array(column) for column in store.columns(ticker))
+        daily = store.bars(ticker, "daily")
+        weekly = store.bars(ticker, "weekly")
+
+        old = ts < raw_cutoff
+        if old.any():
+            daily = merge_bars(np.vstack([daily, to_bars(ts[old], val[old], DAY)]), DAY)
+        aged = daily[:, 0] < daily_cutoff
+        if aged.any():
+            weekly = merge_bars(np.vstack([weekly, daily[aged]]), WEEK, WEEK_ORIGIN)
+            daily = daily[~aged]
+
+        # Bars are written before the raw points they absorb are dropped
+        if old.any() or aged.any():
+            store.replace_bars(ticker, "weekly", weekly)
+            store.replace_bars(ticker, "daily", daily)
+        if old.any():
+            store.replace_columns(ticker, ts[~old], val[~old])
+    return len(ts), int((~old).sum())
+
+
+def compact_store(store, now=None, raw_days=DEFAULT_RAW_DAYS, daily_days=DEFAULT_DAILY_DAYS):
+    """Compact every ticker in a store; returns total raw points before and after"""
+    before = after = 0
+    for ticker in store.tickers():
+        b, a = compact_ticker(store, ticker, now, raw_days, daily_days)
+        before += b
+        after += a
+    return before, after
+
+
+if __name__ == "__main__":
+    # Usage: python tracker_retention.py [nav_tracker.json:nav market_price_tracker.json:price ...]
+    targets = sys.argv[1:] or ["nav_tracker.json:nav", "market_price_tracker.json:price"]
+    for target in targets:
+        json_file, value_key = target.split(":")
+        before, after = compact_store(open_tracker(json_file, value_key))
+        print(f"🗜️ {json_file}: {before:,} raw points -> {after:,}")
@@ -0,0 +1,274 @@
+"""Columnar, append-only storage for the NAV and market price trackers.
+
+Each tracker lives in a directory next to its legacy JSON file
+(``nav_tracker.json`` -> ``nav_tracker.store/``). Every ticker gets two
+little-endian float64 column files: ``<TICKER>.ts`` holds UTC epoch seconds
+and ``<TICKER>.val`` holds the NAV/price. Appending a point writes 16 bytes;
+reads memory-map the columns instead of parsing the whole history.
+Older history can be compacted by ``tracker_retention`` into
+``<TICKER>.daily`` / ``<TICKER>.weekly`` OHLC bar files.
+"""
+import datetime
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+
+import numpy as np
+
+STORE_SUFFIX = ".store"
+TS_EXT = ".ts"
+VAL_EXT = ".val"
+BAR_TIERS = ("daily", "weekly")
+BAR_FIELDS = ("ts", "open", "high", "low", "close", "count")
+DTYPE = np.dtype("<f8")
+_RECORD = struct.Struct("<d")
+
+_EMPTY = np.empty(0, dtype=DTYPE)
+
+
+def store_path(json_file):
+    """Return the store directory that backs a legacy JSON tracker file"""
+    root, _ = os.path.splitext(json_file)
+    return root + STORE_SUFFIX
+
+
+def to_epoch(when):
+    """Convert a naive-UTC datetime or ISO string to epoch seconds"""
+    if isinstance(when, str):
+        when = datetime.datetime.fromisoformat(when)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return when.timestamp()
+
+
+def from_epoch(ts):
+    """Convert epoch seconds back to the naive-UTC datetimes used by app.py"""
+    return datetime.datetime.fromtimestamp(float(ts), datetime.timezone.utc).replace(tzinfo=None)
+
+
+class TrackerStore:
+    """Per-ticker (timestamp, value) series stored as memory-mapped columns"""
+
+    def __init__(self, path, value_key):
+        self.path = path
+        self.value_key = value_key
+        os.makedirs(path, exist_ok=True)
+        self._maps = {}  # ticker -> (length, ts memmap, val memmap)
+        self.lock = threading.RLock()  # serializes appends with compaction
+
+    def _file(self, ticker, ext):
+        return os.path.join(self.path, ticker + ext)
+
+    def _length(self, ticker):
+        try:
+            ts_size = os.path.getsize(self._file(ticker, TS_EXT))
+            val_size = os.path.getsize(self._file(ticker, VAL_EXT))
+        except OSError:
+            return 0
+        # A torn append can leave the columns out of step; only expose
+        # records that are complete in both files.
+        return min(ts_size, val_size) // DTYPE.itemsize
+
+    def version(self, ticker):
+        """(length, inode) of the columns; the inode changes when compaction rewrites them"""
+        try:
+            return self._length(ticker), os.stat(self._file(ticker, VAL_EXT)).st_ino
+        except OSError:
+            return 0, None
+
+    def tickers(self):
+        return sorted(name[:-len(VAL_EXT)] for name in os.listdir(self.path) if name.endswith(VAL_EXT))
+
+    def __contains__(self, ticker):
+        return self._length(ticker) > 0
+
+    def __len__(self):
+        return len(self.tickers())
+
+    def count(self, ticker):
+        return self._length(ticker)
+
+    # --- Writes ---
+
+    def append(self, ticker, value, when=None):
+        """Append one point in O(1) without touching the existing history"""
+        ts = to_epoch(when or datetime.datetime.utcnow())
+        with self.lock:
+            with open(self._file(ticker, VAL_EXT), "ab") as f:
+                f.write(_RECORD.pack(float(value)))
+            with open(self._file(ticker, TS_EXT), "ab") as f:
+                f.write(_RECORD.pack(ts))
+
+    def append_many(self, ticker, timestamps, values):
+        """Append a batch of points (epoch seconds and values) in one write per column"""
+        ts = np.asarray(timestamps, dtype=DTYPE)
+        val = np.asarray(values, dtype=DTYPE)
+        if ts.shape != val.shape:
+            raise ValueError(f"{ticker}: {len(ts)} timestamps for {len(val)} values")
+        with self.lock:
+            with open(self._file(ticker, VAL_EXT), "ab") as f:
+                f.write(val.tobytes())
+            with open(self._file(ticker, TS_EXT), "ab") as f:
+                f.write(ts.tobytes())
+
+    def _write_atomic(self, path, data):
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def replace_columns(self, ticker, timestamps, values):
+        """Atomically rewrite a ticker's raw columns (used by compaction; hold self.lock)"""
+        ts = np.ascontiguousarray(timestamps, dtype=DTYPE)
+        val = np.ascontiguousarray(values, dtype=DTYPE)
+        # Values first: a reader that sees new values with old timestamps
+        # only ever trims to the shorter column.
+        self._write_atomic(self._file(ticker, VAL_EXT), val.tobytes())
+        self._write_atomic(self._file(ticker, TS_EXT), ts.tobytes())
+        self._maps.pop(ticker, None)
+
+    def replace_bars(self, ticker, tier, bars):
+        self._write_atomic(self._file(ticker, "." + tier), np.ascontiguousarray(bars, dtype=DTYPE).tobytes())
+
+    # --- Reads ---
+
+    def columns(self, ticker):
+        """Return read-only memory-mapped (timestamps, values) arrays for a ticker"""
+        version = self.version(ticker)
+        n = version[0]
+        cached = self._maps.get(ticker)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+        if n == 0:
+            return _EMPTY, _EMPTY
+        ts = np.memmap(self._file(ticker, TS_EXT), dtype=DTYPE, mode="r", shape=(n,))
+        val = np.memmap(self._file(ticker, VAL_EXT), dtype=DTYPE, mode="r", shape=(n,))
+        self._maps[ticker] = (version, ts, val)
+        return ts, val
+
+    def bars(self, ticker, tier):
+        """Return a tier's OHLC bars as an (n, 6) array: ts, open, high, low, close, count"""
+        path = self._file(ticker, "." + tier)
+        if not os.path.exists(path):
+            return np.empty((0, len(BAR_FIELDS)), dtype=DTYPE)
+        return np.fromfile(path, dtype=DTYPE).reshape(-1, len(BAR_FIELDS))
+
+    def series(self, ticker):
+        """Full history across tiers: weekly and daily bar closes, then raw points"""
+        parts_ts, parts_val = [], []
+        for tier in reversed(BAR_TIERS):
+            bars = self.bars(ticker, tier)
+            parts_ts.append(bars[:, 0])
+            parts_val.append(bars[:, 4])
+        ts, val = self.columns(ticker)
+        parts_ts.append(ts)
+        parts_val.append(val)
+        return np.concatenate(parts_ts), np.concatenate(parts_val)
+
+    def value_at(self, ticker, epoch, tolerance=None):
+        """Last value recorded at or before `epoch`, falling back to compacted bars
+
+        With `tolerance` (seconds) the point must lie within that distance of
+        `epoch`: a last point that is older is passed over for the first one
+        after `epoch`, and None is returned when neither is close enough.
+        """
+        ts, val = self.columns(ticker)
+        idx = np.searchsorted(ts, epoch, side="right") - 1
+        if idx < 0:
+            ts, val = self.series(ticker)
+            idx = np.searchsorted(ts, epoch, side="right") - 1
+        if tolerance is None:
+            return float(val[idx]) if idx >= 0 else None
+        for i in (idx, idx + 1):
+            if 0 <= i < len(ts) and abs(ts[i] - epoch) <= tolerance:
+                return float(val[i])
+        return None
+
+    def timestamps(self, ticker):
+        return self.columns(ticker)[0]
+
+    def values(self, ticker):
+        return self.columns(ticker)[1]
+
+    def last(self, ticker):
+        """Return the latest (datetime, value) point for a ticker, or None"""
+        ts, val = self.columns(ticker)
+        if not len(val):
+            return None
+        return from_epoch(ts[-1]), float(val[-1])
+
+    def last_value(self, ticker):
+        point = self.last(ticker)
+        return point[1] if point else None
+
+    def records(self, ticker, limit=None):
+        """Return points in the legacy ``[{"date", <value_key>}]`` shape"""
+        ts, val = self.columns(ticker)
+        if limit is not None:
+            ts, val = ts[-limit:], val[-limit:]
+        return [
+            {"date": from_epoch(t).isoformat(), self.value_key: float(v)}
+            for t, v in zip(ts, val)
+        ]
+
+
+# --- Migration from the legacy JSON trackers ---
+
+def migrate_json(json_file, value_key, path=None):
+    """One-shot import of a legacy JSON tracker; a no-op once the store exists"""
+    path = path or store_path(json_file)
+    if os.path.isdir(path):
+        return TrackerStore(path, value_key)
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    store = TrackerStore(tmp_path, value_key)
+
+    if os.path.exists(json_file):
+        with open(json_file, "r") as f:
+            legacy = json.load(f)
+        for ticker, entries in legacy.items():
+            points = [
+                (to_epoch(entry["date"]), entry[value_key])
+                for entry in entries
+                if entry.get(value_key) is not None
+            ]
+            points.sort(key=lambda p: p[0])
+            if points:
+                ts, val = zip(*points)
+                store.append_many(ticker, ts, val)
+
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process (monitor or dashboard) finished the migration first.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return TrackerStore(path, value_key)
+
+
+_open_stores = {}
+_open_lock = threading.Lock()
+
+
+def open_tracker(json_file, value_key):
+    """Open the store behind a tracker file, migrating the JSON on first use
+
+    Stores are shared per process so appends and compaction use one lock.
+    """
+    with _open_lock:
+        path = os.path.abspath(store_path(json_file))
+        if path not in _open_stores:
+            _open_stores[path] = migrate_json(json_file, value_key)
+        return _open_stores[path]
+
+
+if __name__ == "__main__":
+    # Usage: python tracker_store.py [nav_tracker.json:nav market_price_tracker.json:price ...]
+    targets = sys.argv[1:] or ["nav_tracker.json:nav", "market_price_tracker.json:price"]
+    for target in targets:
+        json_file, value_key = target.split(":")
+        store = migrate_json(json_file, value_key)
+        total = sum(store.count(t) for t in store.tickers())
+        print(f"✅ {json_file} -> {store.path}: {len(store)} tickers, {total:,} points")
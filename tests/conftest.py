@@ -0,0 +1,27 @@
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+
+
+import shutil  # noqa: E402
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    """The monitor's modules, running in a fresh working directory with the example config"""
+    shutil.copy(os.path.join(APP_DIR, 'config.yaml.example'), tmp_path / 'config.yaml')
+    shutil.copy(os.path.join(APP_DIR, 'portfolio.json'), tmp_path / 'portfolio.json')
+    monkeypatch.chdir(tmp_path)
+    import config
+    monkeypatch.setattr(config, '_service', None)
+    import app
+    import app_monitoring
+    monkeypatch.setattr(app, '_alert_digests', {})
+    monkeypatch.setattr(app, '_alert_dedup', None)
+    app.apply_config(config.get_config())
+    monkeypatch.setattr(app, 'HEARTBEAT_URL', None)
+    return app, app_monitoring
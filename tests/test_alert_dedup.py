@@ -0,0 +1,120 @@
+import datetime
+import json
+import threading
+import time
+
+import pytest
+
+import alert_dedup
+from alert_dedup import AlertDedupStore
+
+DAY = 86400
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(alert_dedup.time, 'time', lambda: now[0])
+    return now
+
+
+def log_hashes(path):
+    with open(path) as f:
+        return [json.loads(line)['hash'] for line in f]
+
+
+def test_alerts_expire_after_their_type_cooldown(tmp_path, clock):
+    store = AlertDedupStore(str(tmp_path / 'alerts.log'), cooldowns={'trim': 30 * DAY})
+    assert store.should_send('premium')
+    assert store.should_send('trim', 'trim')
+    assert not store.should_send('premium')
+
+    clock[0] += DAY
+    assert store.should_send('premium')
+    assert not store.should_send('trim', 'trim')
+
+    clock[0] += 29 * DAY
+    assert store.should_send('trim', 'trim')
+
+
+def test_flushed_alerts_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / 'alerts.log')
+    store = AlertDedupStore(path, cooldowns={'trim': 30 * DAY})
+    store.should_send('premium')
+    store.should_send('trim', 'trim')
+    store.flush()
+    store.should_send('never_flushed')
+    with open(path, 'a') as f:
+        f.write('{"hash": "torn')  # crash mid-append
+
+    clock[0] += 2 * DAY
+    restarted = AlertDedupStore(path, cooldowns={'trim': 30 * DAY})
+    assert not restarted.should_send('trim', 'trim')
+    assert restarted.should_send('premium')
+    assert restarted.should_send('never_flushed')
+
+
+def test_legacy_history_is_imported_once(tmp_path, clock):
+    legacy = tmp_path / 'alert_history.json'
+    sent = datetime.datetime.utcfromtimestamp(clock[0])
+    legacy.write_text(json.dumps({
+        'recent': (sent - datetime.timedelta(hours=1)).isoformat(),
+        'old': (sent - datetime.timedelta(days=3)).isoformat(),
+    }))
+    path = str(tmp_path / 'alerts.log')
+
+    store = AlertDedupStore(path, legacy_file=str(legacy))
+    assert log_hashes(path) == ['recent']
+    assert not store.should_send('recent')
+    assert store.should_send('old')
+
+    # The log now exists, so the legacy file is no longer read
+    legacy.write_text(json.dumps({'later': sent.isoformat()}))
+    assert AlertDedupStore(path, legacy_file=str(legacy)).should_send('later')
+
+
+def test_log_is_compacted_once_expired_entries_outnumber_live_ones(tmp_path, clock):
+    path = str(tmp_path / 'alerts.log')
+    store = AlertDedupStore(path)
+    for i in range(5):
+        store.should_send(f'old{i}')
+    store.flush()
+    assert len(log_hashes(path)) == 5
+
+    clock[0] += DAY
+    store.should_send('new')
+    store.flush()
+    assert log_hashes(path) == ['new']
+    assert store.log_lines == 1
+
+
+def test_restart_compacts_a_log_of_expired_entries(tmp_path, clock):
+    path = str(tmp_path / 'alerts.log')
+    store = AlertDedupStore(path)
+    store.should_send('a')
+    store.should_send('b')
+    store.flush()
+
+    clock[0] += DAY
+    AlertDedupStore(path)
+    assert log_hashes(path) == []
+
+
+def test_monitor_threads_share_one_store(monitor, monkeypatch):
+    app, _ = monitor
+    created = []
+
+    class SlowStore:
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(app, 'AlertDedupStore', SlowStore)
+    stores = []
+    threads = [threading.Thread(target=lambda: stores.append(app.get_alert_dedup())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(store is created[0] for store in stores)
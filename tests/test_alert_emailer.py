@@ -0,0 +1,200 @@
+"""AlertOutbox against a local aiosmtpd server with STARTTLS and AUTH."""
+import os
+import socket
+import ssl
+import subprocess
+import time
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+import alert_emailer  # noqa: E402
+from alert_emailer import AlertOutbox  # noqa: E402
+
+
+class Recorder:
+    """aiosmtpd handler that records messages and can refuse recipients"""
+
+    def __init__(self):
+        self.messages = []
+        self.refuse = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode('utf-8', 'replace'))
+        return '250 Message accepted'
+
+
+def subjects(handler):
+    return [line.split(': ', 1)[1] for m in handler.messages for line in m.splitlines() if line.startswith('Subject: ')]
+
+
+@pytest.fixture(scope='module')
+def tls_context(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('tls')
+    cert, key = directory / 'cert.pem', directory / 'key.pem'
+    try:
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+             '-keyout', str(key), '-out', str(cert)],
+            check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("openssl is needed for a STARTTLS test server")
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(str(cert), str(key))
+    return context
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class SMTPServer:
+    def __init__(self, tls_context, port):
+        self.tls_context = tls_context
+        self.port = port
+        self.handler = Recorder()
+        self.controller = None
+
+    def start(self):
+        self.controller = aiosmtpd_controller.Controller(
+            self.handler, hostname='127.0.0.1', port=self.port, tls_context=self.tls_context,
+            require_starttls=True, authenticator=lambda *args: AuthResult(success=True))
+        self.controller.start()
+
+    def stop(self):
+        self.controller.stop()
+        self.controller = None
+
+
+@pytest.fixture
+def smtp(tls_context):
+    server = SMTPServer(tls_context, free_port())
+    server.start()
+    yield server
+    if server.controller is not None:
+        server.stop()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(alert_emailer, 'MAX_RETRY_DELAY', 0.2)
+
+
+def settings(port):
+    return {
+        'smtp_server': '127.0.0.1',
+        'smtp_port': port,
+        'sender_email': 'monitor@example.com',
+        'sender_password': 'secret',
+        'receivers': ['ops@example.com'],
+    }
+
+
+def spooled(spool_dir):
+    return sorted(name for name in os.listdir(spool_dir) if name != 'failed')
+
+
+def test_sends_and_clears_spool(smtp, tmp_path):
+    outbox = AlertOutbox(settings(smtp.port), spool_dir=str(tmp_path))
+    outbox.enqueue("first", "body")
+    outbox.enqueue("second", "body")
+    assert outbox.flush(timeout=10)
+    assert subjects(smtp.handler) == ["first", "second"]
+    assert spooled(tmp_path) == []
+
+
+def test_reconnects_after_the_session_drops(smtp, tmp_path):
+    outbox = AlertOutbox(settings(smtp.port), spool_dir=str(tmp_path))
+    outbox.enqueue("before", "body")
+    assert outbox.flush(timeout=10)
+    first_session = outbox.server
+
+    smtp.stop()  # drops the open session
+    smtp.start()
+    outbox.enqueue("after", "body")
+    assert outbox.flush(timeout=10)
+    assert subjects(smtp.handler) == ["before", "after"]
+    assert outbox.server is not first_session
+
+
+def test_outage_is_retried_from_the_spool(tls_context, tmp_path):
+    server = SMTPServer(tls_context, free_port())  # not started yet: connections are refused
+    outbox = AlertOutbox(settings(server.port), spool_dir=str(tmp_path))
+    outbox.enqueue("during outage", "body")
+    time.sleep(0.5)
+    assert len(spooled(tmp_path)) == 1  # still on disk while the server is down
+
+    server.start()
+    try:
+        assert outbox.flush(timeout=10)
+        assert subjects(server.handler) == ["during outage"]
+        assert spooled(tmp_path) == []
+    finally:
+        server.stop()
+
+
+def test_spool_left_by_a_previous_run_is_sent_on_startup(smtp, tmp_path):
+    (tmp_path / "1-old.json").write_text('{"subject": "left over", "body": "body", "receivers": null}')
+    # A claim held by a process that no longer exists is released and sent too
+    (tmp_path / "2-old.json.999999999.sending").write_text('{"subject": "orphaned", "body": "body", "receivers": null}')
+    outbox = AlertOutbox(settings(smtp.port), spool_dir=str(tmp_path))
+    assert outbox.flush(timeout=10)
+    assert subjects(smtp.handler) == ["left over", "orphaned"]
+    assert spooled(tmp_path) == []
+
+
+def test_rejected_message_is_dead_lettered(smtp, tmp_path):
+    smtp.handler.refuse.add('nobody@example.com')
+    outbox = AlertOutbox(settings(smtp.port), spool_dir=str(tmp_path))
+    outbox.enqueue("refused", "body", receivers=['nobody@example.com'])
+    outbox.enqueue("accepted", "body")
+    assert outbox.flush(timeout=10)
+    assert subjects(smtp.handler) == ["accepted"]
+    assert len(os.listdir(tmp_path / 'failed')) == 1
+    assert spooled(tmp_path) == []
+
+
+def test_missing_spool_file_does_not_wedge_the_queue(smtp, tmp_path):
+    outbox = AlertOutbox(settings(smtp.port), spool_dir=str(tmp_path))
+    outbox.queue.put(str(tmp_path / "already-sent.json"))  # another sender got there first
+    outbox.enqueue("next", "body")
+    assert outbox.flush(timeout=10)
+    assert subjects(smtp.handler) == ["next"]
+
+
+def test_senders_sharing_a_spool_send_each_alert_once(smtp, tmp_path):
+    for i in range(10):
+        (tmp_path / f"{i:02d}.json").write_text(f'{{"subject": "alert {i}", "body": "body", "receivers": null}}')
+    outboxes = [AlertOutbox(settings(smtp.port), spool_dir=str(tmp_path)) for _ in range(2)]
+    assert all(outbox.flush(timeout=10) for outbox in outboxes)
+    assert sorted(subjects(smtp.handler)) == [f"alert {i}" for i in range(10)]
+
+
+def test_edited_email_settings_apply_without_a_restart(smtp, tls_context, tmp_path, monkeypatch):
+    config = {'email_settings': settings(smtp.port)}
+    monkeypatch.setattr(alert_emailer, 'get_config', lambda: config)
+    outbox = AlertOutbox(spool_dir=str(tmp_path))
+    outbox.enqueue("old server", "body")
+    assert outbox.flush(timeout=10)
+
+    moved = SMTPServer(tls_context, free_port())
+    moved.start()
+    try:
+        config = {'email_settings': {**settings(moved.port), 'receivers': ['new@example.com']}}
+        outbox.enqueue("new server", "body")
+        assert outbox.flush(timeout=10)
+        assert subjects(smtp.handler) == ["old server"]
+        assert subjects(moved.handler) == ["new server"]
+        assert "To: new@example.com" in moved.handler.messages[0]
+    finally:
+        moved.stop()
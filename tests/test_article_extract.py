@@ -0,0 +1,36 @@
+import glob
+import os
+
+import pytest
+
+import article_extract
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'fixtures', 'articles', '*.html')))
+EXTRACTORS = article_extract.available_extractors()
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('path', FIXTURES, ids=os.path.basename)
+def test_backends_extract_the_same_text(path):
+    texts = {}
+    for extractor in EXTRACTORS:
+        article_extract._domain_selectors.clear()
+        texts[extractor.name] = article_extract.extract_text(read(path), 'https://seekingalpha.com/article', extractor)
+    assert len(set(texts.values())) == 1, texts.keys()
+    text = texts[EXTRACTORS[0].name]
+    if os.path.basename(path) == 'teaser_only.html':
+        assert text == ''
+    else:
+        assert len(text) > article_extract.MIN_CONTENT_CHARS
+        assert 'window.__APP_STATE__' not in text and 'font-family' not in text
+
+
+def test_winning_selector_is_cached_per_domain():
+    article_extract._domain_selectors.clear()
+    page = read(next(p for p in FIXTURES if p.endswith('main_tag.html')))
+    article_extract.extract_text(page, 'https://example.com/a', EXTRACTORS[0])
+    assert article_extract._domain_selectors == {'example.com': 'main'}
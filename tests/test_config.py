@@ -0,0 +1,22 @@
+import os
+import shutil
+
+from conftest import APP_DIR
+from config import ConfigService
+
+
+def test_only_reload_swaps_the_snapshot(tmp_path):
+    config_file = tmp_path / 'config.yaml'
+    shutil.copy(os.path.join(APP_DIR, 'config.yaml.example'), config_file)
+    service = ConfigService(str(config_file), str(tmp_path / 'portfolio.json'), log=lambda msg: None)
+    changes = []
+    service.subscribe(lambda old, new, added, removed: changes.append(added))
+
+    text = config_file.read_text().replace('tickers:\n', 'tickers:\n  - NEWT\n', 1)
+    config_file.write_text(text)
+
+    assert 'NEWT' not in service.current().config['tickers']
+    assert changes == []
+    assert service.reload()
+    assert 'NEWT' in service.current().config['tickers']
+    assert changes == [{'NEWT'}]
@@ -0,0 +1,41 @@
+"""Importing the monitor and the dashboard's service modules stays light."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import APP_DIR
+
+IMPORT_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ('yfinance', 'pandas', 'requests', 'feedparser', 'textblob', 'bs4')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {modules}
+print(json.dumps({{'seconds': time.perf_counter() - started, 'modules': sorted(sys.modules)}}))
+"""
+
+
+@pytest.mark.parametrize('modules', [
+    'app',
+    # The service modules dashboard.py imports before rendering
+    'news_service, dividend_history, background_service, response_cache, risk_metrics, '
+    'sentiment, article_cache, data_cache',
+])
+def test_import_stays_within_budget(modules, tmp_path):
+    # Run where a real deployment would: the app's working directory with its config files
+    shutil.copy(os.path.join(APP_DIR, 'config.yaml.example'), tmp_path / 'config.yaml')
+    shutil.copy(os.path.join(APP_DIR, 'portfolio.json'), tmp_path / 'portfolio.json')
+    env = {**os.environ, 'PYTHONPATH': APP_DIR, 'PYTHONDONTWRITEBYTECODE': '1'}
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(modules=modules)],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True, timeout=60)
+    probe = json.loads(result.stdout.splitlines()[-1])
+
+    loaded = [name for name in HEAVY_MODULES if name in probe['modules']]
+    assert loaded == [], f"import {modules} loaded {loaded}"
+    assert probe['seconds'] < IMPORT_BUDGET_SECONDS, f"import {modules} took {probe['seconds']:.2f}s"
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(response_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_only_missing_or_stale_keys_are_fetched(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttls={'info': 60})
+    requested = []
+
+    def fetch(keys):
+        requested.append(sorted(keys))
+        return {key: {'totalAssets': clock[0]} for key in keys}
+
+    cache.get_many('info', ['A', 'B'], fetch)
+    clock[0] += 30
+    cache.get_many('info', ['A', 'B', 'C'], fetch)
+    clock[0] += 45
+    cache.get_many('info', ['A', 'C'], fetch)
+    assert requested == [['A', 'B'], ['C'], ['A']]
+
+
+def test_peek_returns_stale_entries_until_they_are_purged(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttls={'info': 60})
+    cache.get_many('info', ['OLD'], lambda keys: {'OLD': 1})
+    clock[0] += 3600
+    cache.get_many('info', ['NEW'], lambda keys: {'NEW': 2})  # a write to the same kind
+    assert cache.peek('info', ['OLD', 'NEW']) == {'OLD': 1, 'NEW': 2}
+
+    clock[0] += response_cache.PURGE_AFTER
+    cache.get_many('info', ['NEW'], lambda keys: {'NEW': 3})
+    assert cache.peek('info', ['OLD', 'NEW']) == {'NEW': 3}
+
+
+def test_concurrent_callers_share_one_fetch(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    release = threading.Event()
+    calls = []
+
+    def fetch(keys):
+        calls.append(keys)
+        release.wait(5)
+        return {key: key.lower() for key in keys}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_many('info', ['A'], fetch)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)  # the other three are waiting on the first caller's request
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [{'A': 'a'}] * 4
+    assert len(calls) == 1
+    assert cache.stats()['coalesced'] == 3
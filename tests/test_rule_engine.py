@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pytest
+import yaml
+
+from conftest import APP_DIR
+from rule_engine import RULE_SET_COLUMNS, RuleError, compile_rule_set, compile_rule_sets, default_rules
+
+
+def table(rule_set, **columns):
+    """A metrics table with one row per value; unset columns are missing"""
+    rows = len(next(iter(columns.values())))
+    out = {name: np.full(rows, np.nan) for name in RULE_SET_COLUMNS[rule_set]}
+    out.update({name: np.asarray(values, dtype=float) for name, values in columns.items()})
+    out['ticker'] = [f"T{i}" for i in range(rows)]
+    return out
+
+
+def fired(rule_set, data):
+    """{rule name: [row, ...]} for the rules that matched"""
+    return {rule.name: rows.tolist() for rule, rows in rule_set.evaluate(data)}
+
+
+def matches(rule_set, when, **columns):
+    rules = compile_rule_set(rule_set, [{'name': 'r', 'when': when}])
+    return fired(rules, table(rule_set, **columns)).get('r', [])
+
+
+@pytest.fixture
+def example_config():
+    with open(os.path.join(APP_DIR, 'config.yaml.example')) as f:
+        return yaml.safe_load(f)
+
+
+@pytest.mark.parametrize('when, message', [
+    ("__import__('os')", "unknown function"),
+    ("premium_pct.real > 1", "Attribute is not allowed"),
+    ("[premium_pct][0] > 1", "is not allowed"),
+    ("lambda: 1", "Lambda is not allowed"),
+    ("premium_pct ** 2 > 1", "BinOp is not allowed"),
+    ("premium_pct in (1, 2)", "Compare is not allowed"),
+    ("'2' < premium_pct", "Constant is not allowed"),
+    ("shares > 1", "unknown column 'shares'"),
+    ("abs(premium_pct, 2) > 1", "takes 1 argument"),
+    ("abs(x=premium_pct) > 1", "is not allowed"),
+    ("premium_pct >", "premium_pct >"),
+])
+def test_rejects_anything_outside_the_whitelist(when, message):
+    with pytest.raises(RuleError, match=message):
+        compile_rule_set('risk', [{'name': 'bad', 'when': when}])
+
+
+def test_rejects_malformed_rule_sets():
+    with pytest.raises(RuleError, match="unknown rule set"):
+        compile_rule_set('nope', [])
+    with pytest.raises(RuleError, match="needs a name and a when"):
+        compile_rule_set('risk', [{'name': 'no_when'}])
+    with pytest.raises(RuleError, match="unknown severity"):
+        compile_rule_set('risk', [{'name': 'r', 'when': 'price > 1', 'severity': 'loud'}])
+    with pytest.raises(RuleError, match="'rules' must map"):
+        compile_rule_sets({'rules': ['premium_pct > 1']})
+
+
+def test_chained_comparison():
+    assert matches('risk', "1 <= premium_pct < 3", premium_pct=[0.5, 1, 2, 3, 4]) == [1, 2]
+    assert matches('risk', "price < nav <= buy_nav",
+                   price=[1, 1, 3], nav=[2, 2, 2], buy_nav=[2, 1, 5]) == [0]
+
+
+def test_group_reports_only_the_first_matching_tier(example_config):
+    rules = compile_rule_sets(example_config)['trim']
+    hits = rules.evaluate(table('trim', gain_pct=[30, 20, 16, 10]))
+    assert [(rule.name, rule.params['trim_pct'], rows.tolist()) for rule, rows in hits] == [
+        ('trim_25', 0.20, [0]), ('trim_18', 0.15, [1]), ('trim_15', 0.10, [2])]
+
+
+def test_missing_values_never_fire_a_rule():
+    premium = [np.nan, 1.0, 3.0]
+    assert matches('risk', "premium_pct > 2", premium_pct=premium) == [2]
+    assert matches('risk', "premium_pct != 2", premium_pct=premium) == [1, 2]
+    assert matches('risk', "not premium_pct > 2", premium_pct=premium) == [1]
+    assert matches('risk', "not (premium_pct > 2 and price > 0)", premium_pct=premium, price=[1, 1, 1]) == [1]
+    assert matches('risk', "missing(premium_pct)", premium_pct=premium) == [0]
+    assert matches('risk', "missing(premium_pct) or premium_pct > 2", premium_pct=premium) == [0, 2]
+
+
+def test_known_side_decides_and_or_over_missing_values():
+    volume = [np.nan, np.nan, 10]
+    assert matches('risk', "volume < 100 or price > 5", volume=volume, price=[9, 1, 1]) == [0, 2]
+    assert matches('risk', "not (volume < 100 and price > 5)", volume=volume, price=[9, 1, 9]) == [1]
+
+
+def test_default_risk_rules_match_the_threshold_sections(example_config):
+    rules = compile_rule_sets(example_config)['risk']
+    assert [rule.name for rule in rules.rules] == [
+        'premium_discount', 'nav_decay', 'volume_drop', 'principal_critical', 'principal_danger', 'principal_warning']
+    assert fired(rules, table('risk', premium_pct=[1.9, 2, -2, -1.9])) == {'premium_discount': [1, 2]}
+    assert fired(rules, table('risk', nav_decay_pct=[-4.9, -5, -6])) == {'nav_decay': [1, 2]}
+    assert fired(rules, table('risk', volume_drop_pct=[29, 30, 90])) == {'volume_drop': [1, 2]}
+    assert fired(rules, table('risk', loss_pct=[4, 5, 10, 25])) == {
+        'principal_critical': [3], 'principal_danger': [2], 'principal_warning': [1]}
+
+
+def test_default_risk_rules_follow_configured_thresholds():
+    config = {'risk_thresholds': {'premium_discount_pct': 0.05}, 'principal_loss_thresholds': {'warning': 0.08}}
+    rules = compile_rule_sets(config)['risk']
+    assert fired(rules, table('risk', premium_pct=[4.9, 5], loss_pct=[7, 8])) == {
+        'premium_discount': [1], 'principal_warning': [1]}
+    assert rules.rules[0].severity == 'warning' and rules.rules[1].severity == 'critical'
+
+
+def test_default_trim_tiers_and_rotation_filters(example_config):
+    sets = compile_rule_sets(example_config)
+    trims = [(spec['when'], spec['trim_pct']) for spec in default_rules(example_config)['trim']]
+    assert trims == [("gain_pct >= 25", 0.20), ("gain_pct >= 18", 0.15), ("gain_pct >= 15", 0.10)]
+    assert fired(sets['trim'], table('trim', gain_pct=[14.9, 15, 18, 25])) == {
+        'trim_25': [3], 'trim_18': [2], 'trim_15': [1]}
+
+    rotation = table('rotation', total_assets=[49e6, 50e6, 80e6, 80e6], nav_change_pct=[0, 0, -10.5, -10],
+                     yield_pct=[40, 40, 40, 4.9])
+    assert fired(sets['rotation'], rotation) == {'small_fund': [0], 'decaying_nav': [2], 'weak_payer': [3]}
+
+
+def test_configured_set_replaces_only_its_default(example_config):
+    example_config['rules'] = {'trim': [{'name': 'trim_all', 'when': 'gain_pct > 0', 'trim_pct': 0.5}]}
+    sets = compile_rule_sets(example_config)
+    assert [rule.name for rule in sets['trim'].rules] == ['trim_all']
+    assert sets['trim'].rules[0].params == {'trim_pct': 0.5}
+    assert 'premium_discount' in [rule.name for rule in sets['risk'].rules]
+
+
+def test_shared_subexpressions_are_computed_once():
+    calls = []
+    rules = compile_rule_set('risk', [
+        {'name': 'a', 'when': 'abs(premium_pct) >= 2'},
+        {'name': 'b', 'when': 'abs(premium_pct) >= 2 and price > 1'},
+    ])
+    data = table('risk', premium_pct=[3], price=[2])
+
+    class Counting(dict):
+        def __getitem__(self, key):
+            calls.append(key)
+            return dict.__getitem__(self, key)
+
+    assert fired(rules, Counting(data)) == {'a': [0], 'b': [0]}
+    assert calls.count('premium_pct') == 1
@@ -0,0 +1,73 @@
+"""One scan cycle end to end, against in-memory snapshots instead of Yahoo."""
+import sys
+import types
+
+import pandas as pd
+
+from config import get_config_service
+
+
+class FakeSnapshot:
+    """The parts of MarketSnapshot the scan reads"""
+
+    def __init__(self, quotes, histories, taken_at=None):
+        self.quotes = quotes
+        self.histories = histories
+        self.taken_at = taken_at
+
+    @classmethod
+    def merge(cls, snapshots):
+        quotes, histories = {}, {}
+        for snapshot in snapshots:
+            quotes.update(snapshot.quotes)
+            histories.update(snapshot.histories)
+        return cls(quotes, histories)
+
+    @property
+    def tickers(self):
+        return list(self.quotes)
+
+    def price(self, ticker):
+        return self.quotes[ticker]['price']
+
+    def nav(self, ticker):
+        return self.quotes[ticker]['nav']
+
+    def dividend_yield(self, ticker):
+        return 0.5
+
+    def volume(self, ticker):
+        return 100_000.0
+
+    def total_assets(self, ticker):
+        return 500_000_000
+
+    def history(self, ticker):
+        return self.histories.get(ticker, pd.DataFrame())
+
+
+def test_risk_and_trim_alerts_of_a_cycle_go_out_as_one_digest(monitor, monkeypatch):
+    app, app_monitoring = monitor
+    portfolio = get_config_service().current().portfolio
+    quotes = {}
+    for ticker in get_config_service().current().watchlist:
+        price = portfolio[ticker]['buy_nav'] if ticker in portfolio else 10.0
+        quotes[ticker] = {'price': price, 'nav': price}
+    quotes['YMAX']['price'] = quotes['YMAX']['nav'] * 1.05   # premium_discount fires
+    quotes['TSLY']['price'] = quotes['TSLY']['nav'] * 1.30   # trim_25 fires
+    history = pd.DataFrame({'Close': [10.0] * 25, 'Volume': [100_000.0] * 25})
+
+    def take_snapshot(tickers=None):
+        return FakeSnapshot({t: quotes[t] for t in tickers}, {t: history for t in tickers})
+
+    sent = []
+    monkeypatch.setattr(app, 'take_snapshot', take_snapshot)
+    monkeypatch.setattr(app, 'send_email_alert', lambda subject, body, receivers=None: sent.append((receivers, body)))
+    monkeypatch.setitem(sys.modules, 'market_snapshot', types.SimpleNamespace(MarketSnapshot=FakeSnapshot))
+
+    app_monitoring.monitor_etfs()
+
+    receivers = app.EMAIL_SETTINGS['receivers']
+    assert sorted(r for rs, _ in sent for r in rs) == sorted(receivers)
+    email = next(body for rs, body in sent if rs == [receivers[0]])
+    assert 'YMAX' in email and 'TSLY' in email
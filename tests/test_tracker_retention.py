@@ -0,0 +1,26 @@
+import numpy as np
+
+from risk_metrics import compute_risk_metrics
+from tracker_retention import DAY, compact_store
+from tracker_store import TrackerStore
+
+NOW = 1_700_000_000.0
+
+
+def test_compaction_keeps_recent_repeated_values(tmp_path):
+    store = TrackerStore(str(tmp_path / 'nav'), 'nav')
+    # 40 days of hourly points, with the NAV flat for the last two days
+    ts = NOW - np.arange(40 * 24)[::-1] * 3600.0
+    val = np.where(ts < NOW - 2 * DAY, 10.0 + np.sin(ts / DAY), 9.5)
+    store.append_many('MRNY', ts, val)
+    before = compute_risk_metrics(store, store, ['MRNY'], now=NOW)
+
+    compact_store(store, now=NOW, raw_days=14)
+
+    recent = ts >= np.floor((NOW - 14 * DAY) / DAY) * DAY
+    assert np.array_equal(store.timestamps('MRNY'), ts[recent])
+    assert store.bars('MRNY', 'daily')[:, 5].sum() == (~recent).sum()
+    after = compute_risk_metrics(store, store, ['MRNY'], now=NOW)
+    # The 30-day lookback now resolves to a daily bar; the last-N metrics must not move
+    for key in ('nav', 'price', 'nav_volatility', 'price_momentum', 'nav_drops', 'nav_drop_streak'):
+        np.testing.assert_array_equal(after[key], before[key], err_msg=key)
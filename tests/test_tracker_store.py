@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_metrics import compute_risk_metrics
+from tracker_retention import DAY
+from tracker_store import TrackerStore
+
+NOW = 1_700_000_000.0
+
+
+def make_store(tmp_path, name, points):
+    store = TrackerStore(str(tmp_path / name), 'nav')
+    for ticker, days_ago in points.items():
+        store.append_many(ticker, [NOW - d * DAY for d in days_ago], [10.0 + i for i in range(len(days_ago))])
+    return store
+
+
+def test_value_at_without_tolerance_returns_any_earlier_point(tmp_path):
+    store = make_store(tmp_path, 'nav', {'OLD': [90, 1]})
+    assert store.value_at('OLD', NOW - 30 * DAY) == 10.0
+
+
+def test_value_at_with_tolerance_skips_points_too_far_from_the_date(tmp_path):
+    store = make_store(tmp_path, 'nav', {'OLD': [90, 1], 'NEAR': [31, 1], 'AFTER': [29, 1]})
+    target, tolerance = NOW - 30 * DAY, 2 * DAY
+    assert store.value_at('OLD', target, tolerance) is None
+    assert store.value_at('NEAR', target, tolerance) == 10.0
+    assert store.value_at('AFTER', target, tolerance) == 10.0
+    assert store.value_at('MISSING', target, tolerance) is None
+
+
+def test_nav_decay_is_nan_without_a_reference_near_30_days_ago(tmp_path):
+    nav = make_store(tmp_path, 'nav', {'OLD': [90, 0], 'NEAR': [30.5, 0]})
+    price = make_store(tmp_path, 'price', {})
+    decay = compute_risk_metrics(nav, price, ['OLD', 'NEAR'], now=NOW)['nav_decay_pct']
+    assert np.isnan(decay[0])
+    assert decay[1] == (11.0 - 10.0) / 10.0 * 100
+
+
+class VolumeSnapshot:
+    def __init__(self, last_session, volumes):
+        days = pd.bdate_range(end=last_session, periods=len(volumes), tz='America/New_York')
+        self.tickers = ['YMAX']
+        self.hist = pd.DataFrame({'Volume': volumes}, index=days)
+
+    def history(self, ticker):
+        return self.hist
+
+
+@pytest.mark.parametrize('now, expected_last, expected_average', [
+    ('2026-10-16 11:00', 200.0, 100.0),  # Friday, market open: today's row is still trading
+    ('2026-10-16 17:00', 5.0, 105.0),    # Friday after the close
+    ('2026-10-17 11:00', 5.0, 105.0),    # Saturday: Friday's row is complete
+])
+def test_session_volume_skips_only_todays_open_session(monitor, now, expected_last, expected_average):
+    _, app_monitoring = monitor
+    snapshot = VolumeSnapshot('2026-10-16', [100.0] * 20 + [200.0, 5.0])
+    now = pd.Timestamp(now, tz='America/New_York').to_pydatetime()
+    last, average = app_monitoring._session_volumes([snapshot], now=now)
+    assert (last[0], average[0]) == (expected_last, expected_average)